@@ -0,0 +1,12 @@
+from rest_framework import permissions
+
+
+class IsInstructor(permissions.BasePermission):
+    """Allows instructors and admins (by `User.role`, or staff accounts)."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated
+            and (user.role in ('instructor', 'admin') or user.is_staff)
+        )
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai.recommender import Recommender
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the lesson recommender from progress and quiz attempts. "
+        "With --incremental, only users active since the last build are re-read."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true', help="Refresh the existing model instead of rebuilding it")
+
+    def handle(self, *args, **options):
+        path = settings.RECOMMENDER_MODEL_PATH
+        started = time.monotonic()
+
+        if options['incremental']:
+            try:
+                recommender = Recommender.load(path)
+            except FileNotFoundError:
+                self.stdout.write("No model yet, building from scratch")
+                recommender = Recommender.build()
+            else:
+                refreshed = recommender.refresh()
+                self.stdout.write(f"Refreshed {refreshed} user(s)")
+        else:
+            recommender = Recommender.build()
+
+        recommender.save(path)
+        users, lessons = recommender.matrix.shape
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved recommender for {users} user(s) x {lessons} lesson(s) to {path} in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,65 @@
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.models import LessonExplanation
+from ai.pregeneration import Job, generate
+from ai.services import DIFFICULTIES, content_hash
+from courses.models import Lesson
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates and stores explanations for every lesson x difficulty that has none for the "
+        "current content and model. Safe to interrupt: stored rows are skipped on the next run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('lesson_ids', nargs='*', type=int, help="Only these lessons")
+        parser.add_argument('--difficulty', action='append', choices=DIFFICULTIES, help="Only these difficulties (repeatable)")
+        parser.add_argument('--concurrency', type=int, default=4, help="Requests in flight at once")
+        parser.add_argument('--rate', type=float, default=2.0, help="Request starts per second (0 = unlimited)")
+        parser.add_argument('--max-attempts', type=int, default=5, help="Tries per explanation before giving up")
+        parser.add_argument('--force', action='store_true', help="Regenerate even up-to-date explanations")
+
+    def handle(self, *args, **options):
+        model = settings.PERPLEXITY_MODEL
+        difficulties = options['difficulty'] or DIFFICULTIES
+        lessons = Lesson.objects.order_by('pk')
+        if options['lesson_ids']:
+            lessons = lessons.filter(pk__in=options['lesson_ids'])
+
+        # Stored rows are the checkpoint: skip anything already generated from this content.
+        done = {
+            (lesson_id, difficulty): digest
+            for lesson_id, difficulty, digest in LessonExplanation.objects.filter(model=model, difficulty__in=difficulties)
+            .values_list('lesson_id', 'difficulty', 'content_hash')
+        }
+        skipped = Counter()
+
+        def jobs():
+            # Lazy: lessons are read in chunks as workers free up, never all at once.
+            for lesson_id, content in lessons.values_list('pk', 'content_html').iterator(chunk_size=100):
+                digest = content_hash(content)
+                for difficulty in difficulties:
+                    if not options['force'] and done.get((lesson_id, difficulty)) == digest:
+                        skipped['up to date'] += 1
+                    else:
+                        yield Job(lesson_id, difficulty, content, digest)
+
+        def save(job, text):
+            LessonExplanation.objects.update_or_create(
+                lesson_id=job.lesson_id, difficulty=job.difficulty, model=model,
+                defaults={'content_hash': job.content_hash, 'text': text},
+            )
+
+        stats = async_to_sync(generate)(
+            jobs(), save, model,
+            concurrency=options['concurrency'], rate=options['rate'], max_attempts=options['max_attempts'],
+        )
+        summary = f"Generated {stats['generated']}, failed {stats['failed']}, skipped {skipped['up to date']} up to date"
+        if stats['failed']:
+            raise CommandError(f"{summary}; rerun to retry the failed explanations")
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,51 @@
+"""
+Counters for the AI endpoints, kept in the shared cache so every worker
+adds to the same numbers. Latencies are summed in milliseconds; averages
+are derived when reading.
+"""
+from django.core.cache import cache
+
+PREFIX = 'ai:metrics:'
+COUNTERS = (
+    'explain_cache_hits',
+    'explain_cache_misses',
+    'explain_precomputed',
+    'explain_similar',
+    'upstream_calls',
+    'upstream_errors',
+    'upstream_ms_total',
+)
+
+# Counter for each PerplexityService.lookup source.
+LOOKUP_COUNTERS = {
+    'cache': 'explain_cache_hits',
+    'precomputed': 'explain_precomputed',
+    'similar': 'explain_similar',
+}
+
+
+def incr(name, amount=1):
+    key = PREFIX + name
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # First increment: create the counter (another worker may win the race).
+        cache.add(key, 0, None)
+        cache.incr(key, amount)
+
+
+def record_upstream(duration_ms):
+    incr('upstream_calls')
+    incr('upstream_ms_total', round(duration_ms))
+
+
+def snapshot():
+    values = cache.get_many([PREFIX + name for name in COUNTERS])
+    counters = {name: values.get(PREFIX + name, 0) for name in COUNTERS}
+    # Every lookup answered without the upstream counts as a hit, whatever its source.
+    hits = sum(counters[name] for name in LOOKUP_COUNTERS.values())
+    lookups = hits + counters['explain_cache_misses']
+    counters['explain_cache_hit_ratio'] = round(hits / lookups, 4) if lookups else None
+    calls = counters['upstream_calls']
+    counters['upstream_ms_avg'] = round(counters['upstream_ms_total'] / calls, 1) if calls else None
+    return counters
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0004_lessonsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonExplanation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('difficulty', models.CharField(choices=[('beginner', 'Beginner'), ('intermediate', 'Intermediate'), ('advanced', 'Advanced')], max_length=20)),
+                ('model', models.CharField(max_length=100)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('text', models.TextField()),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='explanations', to='courses.lesson')),
+            ],
+            options={
+                'unique_together': {('lesson', 'difficulty', 'model')},
+            },
+        ),
+    ]
@@ -1,3 +1,30 @@
 from django.db import models
+from courses.models import Lesson
 
-# Create your models here.
+class LessonExplanation(models.Model):
+    """
+    A stored explanation of a lesson for one difficulty and model.
+    
+    Written by `pregenerate_explanations` (and by on-demand misses), so
+    ExplainLessonView can answer without calling Perplexity. `content_hash`
+    is the lesson content it was generated from: after an edit the row no
+    longer matches and is regenerated.
+    """
+    DIFFICULTY_CHOICES = (
+        ('beginner', 'Beginner'),
+        ('intermediate', 'Intermediate'),
+        ('advanced', 'Advanced'),
+    )
+
+    lesson = models.ForeignKey(Lesson, related_name='explanations', on_delete=models.CASCADE)
+    difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES)
+    model = models.CharField(max_length=100)
+    content_hash = models.CharField(max_length=64)
+    text = models.TextField()
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('lesson', 'difficulty', 'model')
+
+    def __str__(self):
+        return f"{self.lesson.title} - {self.difficulty} - {self.model}"
@@ -0,0 +1,139 @@
+"""
+Concurrent pre-generation of lesson explanations, driven by the
+`pregenerate_explanations` command.
+
+Requests run on an asyncio loop: a fixed pool of workers pulls jobs from
+a lazy iterable, so memory and task count stay bounded by the pool size
+however many lessons there are, and a shared limiter spaces request starts. When Perplexity
+answers 429, every worker pauses until its Retry-After has passed. Each
+explanation is saved as soon as it arrives, so the stored rows double as
+the checkpoint: an interrupted run resumes where it stopped.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .services import PerplexityService
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF = 30.0
+
+
+@dataclass(frozen=True)
+class Job:
+    lesson_id: int
+    difficulty: str
+    content: str
+    content_hash: str
+
+
+class RateLimiter:
+    """Spaces request starts to at most `rate` per second (0 = unlimited); `pause` holds everyone back."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next = 0.0
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next, self._paused_until)
+                self._next = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            if time.monotonic() >= self._paused_until:
+                return
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def backoff(attempt):
+    return min(MAX_BACKOFF, 0.5 * 2 ** attempt)
+
+
+def retry_after(response, attempt):
+    """Seconds to wait from a Retry-After header (delta or HTTP date), else exponential backoff."""
+    value = response.headers.get('Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(dt_timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return backoff(attempt)
+
+
+async def request_explanation(client, limiter, job, model, max_attempts):
+    """The explanation text, or None once `max_attempts` are used up or the request is rejected."""
+    payload = PerplexityService.build_payload(job.content, job.difficulty, model)
+    for attempt in range(max_attempts):
+        await limiter.wait()
+        try:
+            response = await client.post(settings.PERPLEXITY_BASE_URL, json=payload, headers=PerplexityService.headers())
+        except httpx.TransportError as e:
+            logger.warning(f"Lesson {job.lesson_id}/{job.difficulty}: {e!r}, retrying")
+            await asyncio.sleep(backoff(attempt))
+            continue
+
+        if response.status_code == 429:
+            limiter.pause(retry_after(response, attempt))
+            continue
+        if response.status_code >= 500:
+            await asyncio.sleep(backoff(attempt))
+            continue
+        if response.is_error:
+            logger.error(f"Lesson {job.lesson_id}/{job.difficulty}: HTTP {response.status_code}, giving up")
+            return None
+        try:
+            return PerplexityService.parse_reply(response.json())
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            logger.error(f"Lesson {job.lesson_id}/{job.difficulty}: unexpected reply ({e!r}), giving up")
+            return None
+
+    logger.error(f"Lesson {job.lesson_id}/{job.difficulty}: no answer after {max_attempts} attempts")
+    return None
+
+
+async def generate(jobs, save, model, concurrency=4, rate=2.0, max_attempts=5):
+    """
+    Generates every job, calling `save(job, text)` (a sync function; it
+    runs on the calling thread when driven through async_to_sync) as each
+    one completes. `jobs` is read lazily by `concurrency` workers, on the
+    same thread as `save`, so it may be a generator over a queryset.
+    Returns a Counter of 'generated' and 'failed'.
+    """
+    limiter = RateLimiter(rate)
+    jobs = iter(jobs)
+    next_job = sync_to_async(next)
+    save = sync_to_async(save)
+    stats = Counter()
+    timeout = httpx.Timeout(settings.PERPLEXITY_READ_TIMEOUT, connect=settings.PERPLEXITY_CONNECT_TIMEOUT)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def worker():
+            while (job := await next_job(jobs, None)) is not None:
+                text = await request_explanation(client, limiter, job, model, max_attempts)
+                if text is None:
+                    stats['failed'] += 1
+                else:
+                    await save(job, text)
+                    stats['generated'] += 1
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return stats
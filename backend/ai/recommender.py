@@ -0,0 +1,283 @@
+"""
+Item-item "next lesson" recommender.
+
+Offline (`build_recommender` command):
+- X: sparse user x lesson interaction matrix from LessonProgress status
+  and best QuizAttempt score.
+- C = X^T X: lesson co-occurrence, kept so that refreshes only apply the
+  rows of users active since the last build (C += X_new^T X_new - X_old^T X_old).
+- S: cosine similarity from C, pruned to each lesson's top neighbours.
+
+Online: only S and lesson popularity are loaded, once per process
+(reloaded when the model file changes); X and C stay on disk for the next
+refresh. A user's recommendations are a sparse row slice and one
+matrix-vector product, well under a millisecond. Users without
+co-occurring history get the most popular lessons.
+
+Refreshes do not notice users whose history was deleted outright, nor
+rows written after the last build with an earlier timestamp: lesson
+access is written behind (progress/access.py), so a touch made before a
+build but flushed after it is missed. The periodic full build takes care
+of both.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max
+from scipy import sparse
+
+STATUS_WEIGHTS = {'not_started': 0.25, 'in_progress': 0.5, 'completed': 1.0}
+NEIGHBOURS = 50
+
+
+def interactions(user_ids=None, since=None):
+    """
+    {user_id (str): {lesson_id: weight}} from progress status and best
+    quiz score (score / 100), whichever is stronger. Limited to `user_ids`,
+    or to users active after `since` (a unix timestamp), when given.
+    """
+    from progress.models import LessonProgress
+    from quizzes.models import QuizAttempt
+
+    progress = LessonProgress.objects.all()
+    attempts = QuizAttempt.objects.all()
+    if since is not None:
+        since = datetime.fromtimestamp(since, dt_timezone.utc)
+        active = set(progress.filter(last_accessed__gte=since).values_list('user_id', flat=True))
+        active |= set(attempts.filter(attempted_at__gte=since).values_list('user_id', flat=True))
+        user_ids = active if user_ids is None else set(user_ids) & active
+    if user_ids is not None:
+        progress = progress.filter(user_id__in=user_ids)
+        attempts = attempts.filter(user_id__in=user_ids)
+
+    rows = {str(user_id): {} for user_id in user_ids or ()}
+    for user_id, lesson_id, status in progress.values_list('user_id', 'lesson_id', 'status').iterator():
+        rows.setdefault(str(user_id), {})[lesson_id] = STATUS_WEIGHTS.get(status, 0.0)
+    best_scores = attempts.values('user_id', 'quiz__lesson_id').annotate(best=Max('score'))
+    for row in best_scores.values_list('user_id', 'quiz__lesson_id', 'best').iterator():
+        user_row = rows.setdefault(str(row[0]), {})
+        user_row[row[1]] = max(user_row.get(row[1], 0.0), row[2] / 100)
+    return rows
+
+
+class Recommender:
+    def __init__(self, lesson_ids, user_ids, matrix, cooccurrence, built_at):
+        self.lesson_ids = np.asarray(lesson_ids, dtype=np.int64)
+        self.user_ids = list(user_ids)
+        self.matrix = matrix.tocsr()
+        self.cooccurrence = cooccurrence.tocsr()
+        self.built_at = built_at
+        self._lesson_index = {int(lesson_id): i for i, lesson_id in enumerate(self.lesson_ids)}
+        self._user_index = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self._compute_similarity()
+
+    # Building
+
+    @classmethod
+    def build(cls):
+        from courses.models import Lesson
+
+        built_at = time.time()
+        lesson_ids = list(Lesson.objects.order_by('pk').values_list('pk', flat=True))
+        rows = interactions()
+        user_ids = sorted(rows)
+        index = {lesson_id: i for i, lesson_id in enumerate(lesson_ids)}
+        matrix = cls._rows_to_matrix([rows[user_id] for user_id in user_ids], index, len(lesson_ids))
+        return cls(lesson_ids, user_ids, matrix, (matrix.T @ matrix).tocsr(), built_at)
+
+    @staticmethod
+    def _rows_to_matrix(rows, lesson_index, n_lessons):
+        data, indices, indptr = [], [], [0]
+        for row in rows:
+            for lesson_id, weight in row.items():
+                if lesson_id in lesson_index and weight:
+                    indices.append(lesson_index[lesson_id])
+                    data.append(weight)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(rows), n_lessons),
+        )
+
+    def refresh(self):
+        """
+        Folds in users active since the last build and lessons added since:
+        only their rows are re-read and applied to C as a delta. "Active"
+        goes by last_accessed, so write-behind touches flushed after the
+        build but stamped before it are missed until the next full build.
+        Returns the number of refreshed users.
+        """
+        from courses.models import Lesson
+
+        built_at = time.time()
+        new_lessons = list(Lesson.objects.filter(pk__gt=int(self.lesson_ids.max(initial=0))).order_by('pk').values_list('pk', flat=True))
+        if new_lessons:
+            self.lesson_ids = np.concatenate([self.lesson_ids, np.asarray(new_lessons, dtype=np.int64)])
+            self._lesson_index = {int(lesson_id): i for i, lesson_id in enumerate(self.lesson_ids)}
+        n_lessons = len(self.lesson_ids)
+
+        rows = interactions(since=self.built_at)
+        new_users = sorted(set(rows) - set(self._user_index))
+        self.user_ids.extend(new_users)
+        self._user_index = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        matrix = self.matrix.copy()
+        matrix.resize((len(self.user_ids), n_lessons))
+        cooccurrence = self.cooccurrence.copy()
+        cooccurrence.resize((n_lessons, n_lessons))
+
+        positions = np.array([self._user_index[user_id] for user_id in rows], dtype=np.int64)
+        if len(positions):
+            old = matrix[positions]
+            new = self._rows_to_matrix(list(rows.values()), self._lesson_index, n_lessons)
+            cooccurrence = cooccurrence + new.T @ new - old.T @ old
+            # Subtraction leaves float dust where counts cancelled out.
+            cooccurrence.data[np.abs(cooccurrence.data) < 1e-9] = 0
+            cooccurrence.eliminate_zeros()
+
+            keep = np.ones(matrix.shape[0])
+            keep[positions] = 0
+            place = sparse.csr_matrix(
+                (np.ones(len(positions)), (positions, np.arange(len(positions)))),
+                shape=(matrix.shape[0], len(positions)),
+            )
+            matrix = sparse.diags(keep) @ matrix + place @ new
+
+        self.matrix = matrix.tocsr()
+        self.cooccurrence = cooccurrence.tocsr()
+        self.built_at = built_at
+        self._compute_similarity()
+        return len(positions)
+
+    def _compute_similarity(self):
+        """Cosine similarity from C, keeping each lesson's NEIGHBOURS strongest neighbours."""
+        norms = np.sqrt(np.maximum(self.cooccurrence.diagonal(), 0))
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        similarity = (sparse.diags(inverse) @ self.cooccurrence @ sparse.diags(inverse)).tolil()
+        similarity.setdiag(0)
+        similarity = similarity.tocsr()
+        similarity.eliminate_zeros()
+
+        for i in range(similarity.shape[0]):
+            start, end = similarity.indptr[i], similarity.indptr[i + 1]
+            if end - start > NEIGHBOURS:
+                row = similarity.data[start:end]
+                row[np.argsort(row)[:-NEIGHBOURS]] = 0
+        similarity.eliminate_zeros()
+        self.similarity = similarity
+        self.popularity = np.asarray(self.matrix.sum(axis=0)).ravel()
+
+    # Serving
+
+    def recommend(self, history, k=5):
+        """
+        Top-k (lesson_id, score) for a {lesson_id: weight} history, skipping
+        lessons already in it. Falls back to popularity when the history
+        has no neighbours. Returns (results, source).
+        """
+        known = [(self._lesson_index[lesson_id], weight) for lesson_id, weight in history.items() if lesson_id in self._lesson_index]
+        seen = np.array([i for i, _ in known], dtype=np.int64)
+        source, scores = 'popular', self.popularity.astype(np.float64)
+        if known:
+            weights = np.array([weight for _, weight in known])
+            similar = self.similarity[seen].T @ weights
+            if similar.any():
+                source, scores = 'similar', similar
+        scores = scores.copy()
+        scores[seen] = 0
+
+        k = min(k, len(scores))
+        if not k:
+            return [], source
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.lesson_ids[i]), float(scores[i])) for i in top if scores[i] > 0], source
+
+    # Persistence
+
+    def save(self, path):
+        """Writes the model atomically, so serving processes never load a partial file."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f'{path}.tmp.npz'
+        np.savez(
+            tmp,
+            lesson_ids=self.lesson_ids,
+            user_ids=np.array(self.user_ids, dtype=str),
+            built_at=np.array(self.built_at),
+            **_dump('matrix', self.matrix),
+            **_dump('cooccurrence', self.cooccurrence),
+            **_dump('similarity', self.similarity),
+            popularity=self.popularity,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['lesson_ids'],
+                [str(user_id) for user_id in data['user_ids']],
+                _restore('matrix', data),
+                _restore('cooccurrence', data),
+                float(data['built_at']),
+            )
+
+    @classmethod
+    def load_serving(cls, path):
+        """
+        A model that can only recommend: reads S and popularity, never X or C,
+        and computes nothing. Use `load` to refresh a model.
+        """
+        model = cls.__new__(cls)
+        with np.load(path, allow_pickle=False) as data:
+            model.lesson_ids = data['lesson_ids']
+            model.built_at = float(data['built_at'])
+            model.similarity = _restore('similarity', data)
+            model.popularity = data['popularity']
+        model._lesson_index = {int(lesson_id): i for i, lesson_id in enumerate(model.lesson_ids)}
+        return model
+
+
+def _dump(name, matrix):
+    return {
+        f'{name}_data': matrix.data,
+        f'{name}_indices': matrix.indices,
+        f'{name}_indptr': matrix.indptr,
+        f'{name}_shape': np.array(matrix.shape),
+    }
+
+
+def _restore(name, data):
+    return sparse.csr_matrix(
+        (data[f'{name}_data'], data[f'{name}_indices'], data[f'{name}_indptr']),
+        shape=tuple(data[f'{name}_shape']),
+    )
+
+
+_loaded = {'model': None, 'mtime': None}
+_load_lock = threading.Lock()
+
+
+def get_recommender():
+    """
+    The model from settings.RECOMMENDER_MODEL_PATH, reloaded when the file
+    changes; None before the first build or when the file predates the
+    saved similarity matrix (rebuild it).
+    """
+    path = settings.RECOMMENDER_MODEL_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _loaded['mtime'] != (path, mtime):
+        with _load_lock:
+            if _loaded['mtime'] != (path, mtime):
+                try:
+                    _loaded['model'] = Recommender.load_serving(path)
+                except KeyError:
+                    _loaded['model'] = None
+                _loaded['mtime'] = (path, mtime)
+    return _loaded['model']
@@ -0,0 +1,154 @@
+"""
+Near-duplicate lookup for pasted `/ai/explain/` prompts.
+
+Exact caching keys on a hash of the content, so a snippet pasted with
+different indentation or one renamed variable misses. Here every prompt
+that got an explanation is also kept as a hashed character-trigram vector
+(L2-normalised, log-scaled counts) in a NumPy matrix. A new prompt is
+vectorised the same way and one matrix-vector product gives its cosine
+similarity to every stored prompt. Above `AI_SEMANTIC_CACHE_THRESHOLD`, the
+closest prompt's cache key is returned and its explanation is read from
+the normal cache. Nothing leaves the process, so no embedding service is
+involved.
+
+Trigram similarity cannot tell `a > b` from `a < b`, True from False or
+`range(10)` from `range(11)`, so a match must also have the same shape:
+the token sequence with every identifier replaced by a placeholder.
+Operators, punctuation, numbers and keywords (`KEYWORDS`) must all be
+equal, while renamed variables, reworded comments and reformatting still
+match. Entries only match prompts with the same difficulty and model. When the table is full, the oldest entry is overwritten.
+
+With `AI_SEMANTIC_CACHE_DIR` set, the matrix lives in memory-mapped `.npy`
+files there. The index then survives restarts and is shared by the workers
+on a host (writers take an flock). Otherwise it is a per-process array.
+"""
+import fcntl
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+DIM = 2048  # power of two: hashes are masked, not reduced modulo
+KEY_BYTES = 80
+ENTRY_DTYPE = np.dtype([('stamp', 'f8'), ('namespace', 'u4'), ('shape', 'u8'), ('key', f'S{KEY_BYTES}')])
+
+# Words that change what code does: kept as-is in the shape, unlike identifiers.
+KEYWORDS = frozenset(
+    'and as assert async await break case catch class const continue def del do elif else except false '
+    'finally for from function global if import in is lambda let match new none nonlocal not null or pass '
+    'raise return self static switch this throw true try typeof undefined var void while with yield'.split()
+)
+
+_WHITESPACE = re.compile(r'\s+')
+_TOKEN = re.compile(r'\w+|[^\w\s]')
+_IDENTIFIER = re.compile(r'[^\W\d]\w*')
+
+
+def vectorize(text, dim=DIM):
+    """Unit-length hashed trigram vector of `text` (case and whitespace insensitive)."""
+    data = _WHITESPACE.sub(' ', text.lower()).strip().encode()
+    grams = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    vector = np.zeros(dim, dtype=np.float32)
+    if len(grams) < 3:
+        return vector
+    h = (grams[:-2] * np.uint32(0x9E3779B1)) ^ (grams[1:-1] * np.uint32(0x85EBCA77)) ^ (grams[2:] * np.uint32(0xC2B2AE3D))
+    h ^= h >> np.uint32(15)
+    counts = np.bincount(h & np.uint32(dim - 1), minlength=dim)
+    np.log1p(counts, out=vector)
+    vector /= np.linalg.norm(vector)
+    return vector
+
+
+def shape_hash(text):
+    """64-bit hash of the case-folded tokens of `text`, with identifiers other than KEYWORDS masked."""
+    tokens = [
+        '\1' if _IDENTIFIER.fullmatch(token) and token not in KEYWORDS else token
+        for token in _TOKEN.findall(text.lower())
+    ]
+    return int.from_bytes(hashlib.blake2b('\0'.join(tokens).encode(), digest_size=8).digest(), 'little')
+
+
+def namespace(difficulty, model):
+    return zlib.crc32(f'{difficulty}:{model}'.encode())
+
+
+class SemanticCache:
+    """Fixed-size table of prompt vectors and the cache keys of their explanations."""
+
+    def __init__(self, size, threshold, directory=None):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._lock_path = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.vectors = self._open(os.path.join(directory, 'vectors.npy'), np.float32, (size, DIM))
+            self.entries = self._open(os.path.join(directory, 'entries.npy'), ENTRY_DTYPE, (size,))
+            self._lock_path = os.path.join(directory, 'lock')
+        else:
+            self.vectors = np.zeros((size, DIM), dtype=np.float32)
+            self.entries = np.zeros(size, dtype=ENTRY_DTYPE)
+
+    @staticmethod
+    def _open(path, dtype, shape):
+        if os.path.exists(path):
+            array = np.load(path, mmap_mode='r+')
+            if array.dtype == dtype and array.shape == shape:
+                return array
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+    @contextmanager
+    def _writing(self):
+        with self._lock:
+            if self._lock_path is None:
+                yield
+                return
+            with open(self._lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+    def lookup(self, text, difficulty, model):
+        """(cache key, similarity) of the closest stored prompt of the same shape above the threshold, or None."""
+        scores = self.vectors @ vectorize(text)
+        scores[(self.entries['namespace'] != namespace(difficulty, model)) | (self.entries['shape'] != shape_hash(text))] = -1
+        best = int(np.argmax(scores))
+        key = self.entries['key'][best]
+        if scores[best] < self.threshold or not key:
+            return None
+        return key.decode(), float(scores[best])
+
+    def add(self, text, difficulty, model, key):
+        vector = vectorize(text)
+        if not vector.any():
+            return
+        with self._writing():
+            slot = int(np.argmin(self.entries['stamp']))
+            # Clear the key first so concurrent readers never pair it with a half-written vector.
+            self.entries['key'][slot] = b''
+            self.vectors[slot] = vector
+            self.entries[slot] = (time.time(), namespace(difficulty, model), shape_hash(text), key.encode()[:KEY_BYTES])
+
+    def flush(self):
+        for array in (self.vectors, self.entries):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+
+_instance = {'cache': None, 'config': None}
+_instance_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """The process-wide SemanticCache for the current settings; None when AI_SEMANTIC_CACHE_SIZE is 0."""
+    config = (settings.AI_SEMANTIC_CACHE_SIZE, settings.AI_SEMANTIC_CACHE_THRESHOLD, settings.AI_SEMANTIC_CACHE_DIR)
+    if _instance['config'] != config:
+        with _instance_lock:
+            if _instance['config'] != config:
+                _instance['cache'] = SemanticCache(*config) if config[0] else None
+                _instance['config'] = config
+    return _instance['cache']
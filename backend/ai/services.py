@@ -1,5 +1,85 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from courses.cache import get_version, lesson_version_key
+from courses.models import Lesson
+from . import metrics
+from .models import LessonExplanation
+from .recommender import get_recommender
+from .semantic_cache import get_semantic_cache
+
+
+DIFFICULTIES = tuple(value for value, _ in LessonExplanation.DIFFICULTY_CHOICES)
+
+
+def difficulty_error(difficulty):
+    """The 400 message for a difficulty the prompts do not know, else None."""
+    if difficulty not in DIFFICULTIES:
+        return f'difficulty must be one of {", ".join(DIFFICULTIES)}'
+    return None
+
+
+class PerplexityError(Exception):
+    """The Perplexity call failed, timed out or returned an unexpected body."""
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    One pooled session per process: keep-alive connections to Perplexity
+    are reused instead of paying a TLS handshake per explanation.
+    Only connection failures are retried; a POST that reached the model
+    is never sent twice.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=10,
+                    max_retries=Retry(total=1, connect=1, read=0, status=0, other=0, allowed_methods=None),
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def content_hash(lesson_content):
+    return hashlib.sha256(lesson_content.encode()).hexdigest()
+
+
+@dataclass
+class ExplanationLookup:
+    key: str
+    version: int
+    difficulty: str
+    model: str
+    lesson_id: int = None
+    content: str = None
+    text: str = None
+    source: str = None
+
+
+@dataclass
+class Explanation:
+    text: str
+    source: str  # 'cache', 'precomputed' or 'upstream'
+    upstream_ms: float = None
+
 
 class PerplexityService:
     """
@@ -8,37 +88,151 @@ class PerplexityService:
     Why separate this?
     - Keeps API keys and URL configs in one place.
     - Allows us to mock this service easily during tests.
-    """
-    BASE_URL = "https://api.perplexity.ai/chat/completions"
     
+    Performance:
+    - Pooled session with (connect, read) timeouts from settings.
+    - Explanations are cached: by lesson version when a lesson id is known
+      (editing the lesson invalidates them), otherwise by a hash of
+      (content, difficulty, model).
+    - Lesson explanations are also stored (LessonExplanation), usually
+      ahead of time by `pregenerate_explanations`.
+    """
+
     @staticmethod
-    def get_explanation(lesson_content, user_difficulty='beginner'):
+    def explanation_cache_key(lesson_content, user_difficulty, model):
+        digest = hashlib.sha256('\0'.join((model, user_difficulty, lesson_content)).encode()).hexdigest()
+        return f'ai:explain:{digest}'
+
+    @staticmethod
+    def lookup(lesson_content=None, user_difficulty='beginner', lesson_id=None):
         """
-        Sends lesson content to Perplexity and asks for a simplification.
+        Finds an explanation without calling Perplexity: from the cache, then
+        from a stored LessonExplanation matching the current content (for
+        lessons) or the cached explanation of a near-identical prompt (for raw
+        content, see semantic_cache.py). On a miss `text` is None and
+        `content` is what to send upstream. Raises Lesson.DoesNotExist for an
+        unknown lesson.
         """
-        headers = {
-            "Authorization": f"Bearer {settings.PERPLEXITY_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
+        model = settings.PERPLEXITY_MODEL
+        if lesson_id is not None:
+            key = f'ai:explain:lesson:{lesson_id}:{user_difficulty}:{model}'
+            version = get_version(lesson_version_key(lesson_id))
+        else:
+            key = PerplexityService.explanation_cache_key(lesson_content, user_difficulty, model)
+            version = None
+        found = ExplanationLookup(key, version, user_difficulty, model, lesson_id, lesson_content)
+
+        found.text = cache.get(key, version=version)
+        if found.text is not None:
+            found.source = 'cache'
+            return found
+
+        if lesson_id is not None:
+            found.content = Lesson.objects.values_list('content_html', flat=True).get(pk=lesson_id)
+            stored = LessonExplanation.objects.filter(lesson_id=lesson_id, difficulty=user_difficulty, model=model).first()
+            if stored is not None and stored.content_hash == content_hash(found.content):
+                found.text, found.source = stored.text, 'precomputed'
+                cache.set(key, found.text, settings.AI_EXPLANATION_CACHE_TTL, version=version)
+        elif (semantic := get_semantic_cache()) is not None:
+            match = semantic.lookup(lesson_content, user_difficulty, model)
+            if match is not None and (text := cache.get(match[0])) is not None:
+                found.text, found.source = text, 'similar'
+                cache.set(key, text, settings.AI_EXPLANATION_CACHE_TTL)
+        return found
+
+    @staticmethod
+    def store(found, text):
+        """Caches (and, for lessons, persists) a freshly generated explanation."""
+        cache.set(found.key, text, settings.AI_EXPLANATION_CACHE_TTL, version=found.version)
+        if found.lesson_id is not None:
+            LessonExplanation.objects.update_or_create(
+                lesson_id=found.lesson_id, difficulty=found.difficulty, model=found.model,
+                defaults={'content_hash': content_hash(found.content), 'text': text},
+            )
+        elif (semantic := get_semantic_cache()) is not None:
+            semantic.add(found.content, found.difficulty, found.model, found.key)
+
+    @staticmethod
+    def explain(lesson_content=None, user_difficulty='beginner', lesson_id=None):
+        """
+        Returns an Explanation of `lesson_content`, or of lesson `lesson_id`:
+        cached or stored text if there is some (see `lookup`), otherwise a
+        fresh Perplexity answer, which is stored for next time. Raises
+        Lesson.DoesNotExist for an unknown lesson, and PerplexityError if
+        the upstream call fails; failures are never cached.
+        """
+        found = PerplexityService.lookup(lesson_content, user_difficulty, lesson_id)
+        if found.text is not None:
+            metrics.incr(metrics.LOOKUP_COUNTERS[found.source])
+            return Explanation(found.text, found.source)
+
+        metrics.incr('explain_cache_misses')
+        started = time.monotonic()
+        try:
+            text = PerplexityService._request_explanation(found.content, user_difficulty, found.model)
+        finally:
+            upstream_ms = (time.monotonic() - started) * 1000
+            metrics.record_upstream(upstream_ms)
+        PerplexityService.store(found, text)
+        return Explanation(text, 'upstream', upstream_ms)
+
+    @staticmethod
+    def build_payload(lesson_content, user_difficulty, model):
         prompt = f"Explain the following lesson content for a {user_difficulty} level student in simple terms:\n\n{lesson_content}"
         
-        payload = {
-            "model": "llama-3-sonar-large-32k-online",
+        return {
+            "model": model,
             "messages": [
                 {"role": "system", "content": "You are a helpful coding tutor."},
                 {"role": "user", "content": prompt}
             ]
         }
-        
+
+    @staticmethod
+    def headers():
+        return {
+            "Authorization": f"Bearer {settings.PERPLEXITY_API_KEY}",
+            "Content-Type": "application/json"
+        }
+
+    @staticmethod
+    def parse_reply(data):
+        return data['choices'][0]['message']['content']
+
+    @staticmethod
+    def _request_explanation(lesson_content, user_difficulty, model):
         try:
-            response = requests.post(PerplexityService.BASE_URL, json=payload, headers=headers)
+            response = get_session().post(
+                settings.PERPLEXITY_BASE_URL,
+                json=PerplexityService.build_payload(lesson_content, user_difficulty, model),
+                headers=PerplexityService.headers(),
+                timeout=(settings.PERPLEXITY_CONNECT_TIMEOUT, settings.PERPLEXITY_READ_TIMEOUT),
+            )
             response.raise_for_status()
-            return response.json()['choices'][0]['message']['content']
-        except Exception as e:
+            return PerplexityService.parse_reply(response.json())
+        except (requests.RequestException, ValueError, KeyError, IndexError, TypeError) as e:
+            metrics.incr('upstream_errors')
+            raise PerplexityError(str(e)) from e
+
+    @staticmethod
+    def get_explanation(lesson_content, user_difficulty='beginner'):
+        """
+        Sends lesson content to Perplexity and asks for a simplification.
+        """
+        try:
+            return PerplexityService.explain(lesson_content, user_difficulty).text
+        except PerplexityError as e:
             return f"Error generation explanation: {str(e)}"
 
     @staticmethod
-    def get_recommendation(user_history):
-        # Implementation for recommendation logic
-        pass
+    def get_recommendation(user_history, k=5):
+        """
+        Next-lesson recommendations for a {lesson_id: weight} history.
+        Served by the local co-occurrence model (recommender.py), not the LLM:
+        returns ([(lesson_id, score), ...], source), or ([], None) before the
+        model has been built.
+        """
+        recommender = get_recommender()
+        if recommender is None:
+            return [], None
+        return recommender.recommend(user_history, k)
@@ -0,0 +1,178 @@
+"""
+Streaming explanations as Server-Sent Events (`explain_stream`).
+
+The view is a native async Django view: under ASGI the upstream token
+stream is relayed chunk by chunk without holding a worker thread, so the
+first words reach the student as soon as Perplexity produces them.
+Cached or precomputed explanations are sent as a single event.
+
+Events:
+    data: {"delta": "..."}              a piece of the explanation
+    event: done / data: {"source": ...}  the explanation is complete
+    event: error / data: {"error": ...}  the upstream call failed
+"""
+import asyncio
+import json
+import logging
+import math
+import time
+import weakref
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from courses.models import Lesson
+from . import metrics
+from .services import PerplexityService, difficulty_error
+
+logger = logging.getLogger(__name__)
+
+# httpx async clients are bound to the event loop that created them:
+# keep one pooled client per loop (one per ASGI worker in practice).
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.PERPLEXITY_READ_TIMEOUT, connect=settings.PERPLEXITY_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+        _clients[loop] = client
+    return client
+
+
+def sse(data, event=None):
+    prefix = f'event: {event}\n' if event else ''
+    return f'{prefix}data: {json.dumps(data)}\n\n'
+
+
+def authenticate(request):
+    """`request` wrapped for DRF and authenticated with the project's authenticators (JWT cookie or header)."""
+    authenticators = [authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    drf_request = Request(request, authenticators=authenticators)
+    drf_request.user  # authenticate now, on this (sync) thread
+    return drf_request
+
+
+def throttle_wait(drf_request):
+    """
+    Applies the project's DRF throttles, as an APIView would. Returns None
+    when the request may go ahead, else the seconds to wait (possibly None).
+    """
+    throttles = [throttle() for throttle in api_settings.DEFAULT_THROTTLE_CLASSES]
+    refused = [throttle for throttle in throttles if not throttle.allow_request(drf_request, None)]
+    if not refused:
+        return None
+    return max((throttle.wait() or 0 for throttle in refused), default=0)
+
+
+async def upstream_events(found):
+    """Relays the upstream stream as SSE, then caches and stores the full text."""
+    payload = {**PerplexityService.build_payload(found.content, found.difficulty, found.model), 'stream': True}
+    parts = []
+    started = time.monotonic()
+    try:
+        async with get_async_client().stream(
+            'POST', settings.PERPLEXITY_BASE_URL, json=payload, headers=PerplexityService.headers()
+        ) as response:
+            if response.status_code != 200:
+                await sync_to_async(metrics.incr)('upstream_errors')
+                yield sse({'error': f'Upstream returned HTTP {response.status_code}'}, event='error')
+                return
+            async for line in response.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                if delta:
+                    parts.append(delta)
+                    yield sse({'delta': delta})
+    except (httpx.HTTPError, ValueError, KeyError, IndexError) as e:
+        logger.warning(f"Explanation stream failed: {e!r}")
+        await sync_to_async(metrics.incr)('upstream_errors')
+        yield sse({'error': 'Explanation service unavailable'}, event='error')
+        return
+    finally:
+        await sync_to_async(metrics.record_upstream)((time.monotonic() - started) * 1000)
+
+    if not parts:
+        # Nothing to cache: the next request should ask again, not get an empty answer.
+        await sync_to_async(metrics.incr)('upstream_errors')
+        yield sse({'error': 'Explanation service returned no text'}, event='error')
+        return
+    await sync_to_async(PerplexityService.store)(found, ''.join(parts))
+    yield sse({'source': 'upstream'}, event='done')
+
+
+async def stored_events(found):
+    yield sse({'delta': found.text})
+    yield sse({'source': found.source}, event='done')
+
+
+@csrf_exempt
+@require_POST
+async def explain_stream(request):
+    """
+    POST {"content" | "lesson_id", "difficulty"} -> text/event-stream.
+    Same input, throttling and caching as ExplainLessonView. Only frees the
+    worker while streaming when served over ASGI (see ai/README.md).
+    """
+    try:
+        drf_request = await sync_to_async(authenticate)(request)
+    except APIException as e:
+        return JsonResponse({'error': str(e.detail)}, status=e.status_code)
+    if not drf_request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication credentials were not provided.'}, status=401)
+    wait = await sync_to_async(throttle_wait)(drf_request)
+    if wait is not None:
+        response = JsonResponse({'error': 'Request was throttled.'}, status=429)
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
+
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(body, dict):
+        return JsonResponse({'error': 'Expected a JSON object'}, status=400)
+    content = body.get('content') or None
+    if content is not None and not isinstance(content, str):
+        return JsonResponse({'error': 'content must be a string'}, status=400)
+    difficulty = body.get('difficulty', 'beginner')
+    if error := difficulty_error(difficulty):
+        return JsonResponse({'error': error}, status=400)
+    lesson_id = None
+    if content is None:
+        try:
+            lesson_id = int(body['lesson_id'])
+        except (KeyError, TypeError, ValueError):
+            return JsonResponse({'error': 'Content is required'}, status=400)
+
+    try:
+        found = await sync_to_async(PerplexityService.lookup)(content, difficulty, lesson_id)
+    except Lesson.DoesNotExist:
+        return JsonResponse({'error': 'Lesson not found'}, status=404)
+
+    if found.text is not None:
+        await sync_to_async(metrics.incr)(metrics.LOOKUP_COUNTERS[found.source])
+        events = stored_events(found)
+    else:
+        await sync_to_async(metrics.incr)('explain_cache_misses')
+        events = upstream_events(found)
+
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
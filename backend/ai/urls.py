@@ -1,6 +1,10 @@
 from django.urls import path
-from .views import ExplainLessonView
+from .views import ExplainLessonView, RecommendationView, AIMetricsView
+from .streaming import explain_stream
 
 urlpatterns = [
     path('explain/', ExplainLessonView.as_view(), name='ai-explain'),
+    path('explain/stream/', explain_stream, name='ai-explain-stream'),
+    path('recommendations/', RecommendationView.as_view(), name='ai-recommendations'),
+    path('metrics/', AIMetricsView.as_view(), name='ai-metrics'),
 ]
@@ -1,17 +1,87 @@
+import logging
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions
-from .services import PerplexityService
+from courses.models import Lesson
+from .services import PerplexityService, PerplexityError, difficulty_error
+from . import metrics
+from .recommender import interactions
+
+logger = logging.getLogger(__name__)
 
 class ExplainLessonView(APIView):
+    """
+    Simplified explanation of lesson content, from `content` or a `lesson_id`.
+    Answers are cached or precomputed (see PerplexityService); the
+    Server-Timing header says where this one came from and how long the
+    upstream took.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         content = request.data.get('content')
+        lesson_id = request.data.get('lesson_id')
         difficulty = request.data.get('difficulty', 'beginner')
         
-        if not content:
+        if not content and lesson_id is None:
             return Response({'error': 'Content is required'}, status=400)
-            
-        explanation = PerplexityService.get_explanation(content, difficulty)
-        return Response({'explanation': explanation})
+        if content and not isinstance(content, str):
+            return Response({'error': 'content must be a string'}, status=400)
+        if error := difficulty_error(difficulty):
+            return Response({'error': error}, status=400)
+
+        if content:
+            lesson_id = None
+        else:
+            try:
+                lesson_id = int(lesson_id)
+            except (TypeError, ValueError):
+                return Response({'error': 'lesson_id must be an integer'}, status=400)
+
+        try:
+            explanation = PerplexityService.explain(content or None, difficulty, lesson_id=lesson_id)
+        except Lesson.DoesNotExist:
+            return Response({'error': 'Lesson not found'}, status=404)
+        except PerplexityError as e:
+            logger.warning(f"Explanation failed: {e!r}")
+            return Response({'error': 'Explanation service unavailable'}, status=502)
+
+        response = Response({'explanation': explanation.text})
+        timing = f'cache;desc="{"hit" if explanation.source == "cache" else "miss"}"'
+        if explanation.source in ('precomputed', 'similar'):
+            timing += f', {explanation.source}'
+        if explanation.upstream_ms is not None:
+            timing += f', upstream;dur={explanation.upstream_ms:.1f}'
+        response['Server-Timing'] = timing
+        return response
+
+class AIMetricsView(APIView):
+    """Explanation cache hit/miss counts and upstream latency, for admins."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
+
+class RecommendationView(APIView):
+    """
+    "What to learn next": top-k lessons (?k=, default 5, max 20) that
+    co-occur with the user's history. The ranking runs in memory; the only
+    queries load the user's own history and the lesson titles.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            k = max(1, min(int(request.query_params.get('k', 5)), 20))
+        except ValueError:
+            return Response({'error': 'k must be an integer'}, status=400)
+
+        history = interactions(user_ids=[request.user.pk]).get(str(request.user.pk), {})
+        recommendations, source = PerplexityService.get_recommendation(history, k)
+        titles = dict(Lesson.objects.filter(pk__in=[lesson_id for lesson_id, _ in recommendations]).values_list('pk', 'title'))
+        results = [
+            {'lesson': lesson_id, 'title': titles[lesson_id], 'score': round(score, 4)}
+            for lesson_id, score in recommendations if lesson_id in titles
+        ]
+        return Response({'source': source, 'results': results})
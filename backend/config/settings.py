@@ -48,9 +48,10 @@ INSTALLED_APPS = [
     'quizzes',
     'ai',
     'executor',
+    'leaderboards',
 ]
 
-SEARCH_BACKEND = 'django.db.models.functions.SearchVector'
+SEARCH_BACKEND = 'django.contrib.postgres.search.SearchVector'
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', # CORS First
@@ -93,7 +94,10 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'password'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Sync views run on each ASGI worker's one thread-sensitive executor
+        # thread, so its connection is reused; health checks drop dead ones.
         'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -110,6 +114,43 @@ CACHES = {
     }
 }
 
+# Course payloads are invalidated by model signals (courses/signals.py),
+# so they can stay cached for a long time.
+COURSE_CACHE_TIMEOUT = int(os.getenv('COURSE_CACHE_TIMEOUT', str(60 * 60 * 24 * 7)))
+# Version keys (courses/cache.py) outlive every payload cached under them;
+# an expired one only costs a rebuild.
+CACHE_VERSION_TIMEOUT = int(os.getenv('CACHE_VERSION_TIMEOUT', str(60 * 60 * 24 * 30)))
+
+# Token-bucket sizes (burst allowance) for code execution, by accounts.User.role.
+# The refill rate stays as defined on the throttle classes in executor/throttling.py.
+CODE_EXECUTION_BURST = {
+    'anon': 10,
+    'student': 30,
+    'instructor': 60,
+    'admin': 120,
+}
+
+# Seconds an executor /health result is reused before it is re-probed.
+EXECUTOR_HEALTH_TTL = int(os.getenv('EXECUTOR_HEALTH_TTL', '10'))
+
+# Perplexity (ai/services.py). Calls are bounded by (connect, read) timeouts
+# so a slow upstream cannot pin a worker; answers are cached for the TTL.
+PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY', '')
+PERPLEXITY_BASE_URL = os.getenv('PERPLEXITY_BASE_URL', 'https://api.perplexity.ai/chat/completions')
+PERPLEXITY_MODEL = os.getenv('PERPLEXITY_MODEL', 'llama-3-sonar-large-32k-online')
+PERPLEXITY_CONNECT_TIMEOUT = float(os.getenv('PERPLEXITY_CONNECT_TIMEOUT', '3.05'))
+PERPLEXITY_READ_TIMEOUT = float(os.getenv('PERPLEXITY_READ_TIMEOUT', '30'))
+AI_EXPLANATION_CACHE_TTL = int(os.getenv('AI_EXPLANATION_CACHE_TTL', str(60 * 60 * 24 * 7)))
+
+# Near-duplicate prompt lookup (ai/semantic_cache.py): cosine similarity of
+# hashed trigram vectors. Size 0 disables it; the dir enables memmap persistence.
+AI_SEMANTIC_CACHE_SIZE = int(os.getenv('AI_SEMANTIC_CACHE_SIZE', '2048'))
+AI_SEMANTIC_CACHE_THRESHOLD = float(os.getenv('AI_SEMANTIC_CACHE_THRESHOLD', '0.9'))
+AI_SEMANTIC_CACHE_DIR = os.getenv('AI_SEMANTIC_CACHE_DIR') or None
+
+# Precomputed lesson recommender (ai/recommender.py), written by `build_recommender`.
+RECOMMENDER_MODEL_PATH = os.getenv('RECOMMENDER_MODEL_PATH', str(BASE_DIR / 'var' / 'recommender.npz'))
+
 # Auth & DRF
 AUTH_USER_MODEL = 'accounts.User'
 SITE_ID = 1
@@ -8,5 +8,6 @@ urlpatterns = [
     path('progress/', include('progress.urls')),
     path('quizzes/', include('quizzes.urls')),
     path('ai/', include('ai.urls')),
+    path('leaderboards/', include('leaderboards.urls')),
     path('api/execute/', include('executor.urls')),
 ]
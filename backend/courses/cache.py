@@ -0,0 +1,118 @@
+"""
+Versioned caching for course content.
+
+Every cached payload is stored under a version read from a separate
+version key. Saving content bumps the version keys it affects (see
+signals.py), which makes the old payloads unreachable; they simply age
+out of Redis. This lets entries live for days and still be correct.
+"""
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+CATALOG_VERSION_KEY = 'courses:catalog:version'
+
+
+def subject_version_key(slug):
+    return f'courses:subject:{slug}:version'
+
+
+def lesson_version_key(lesson_id):
+    return f'courses:lesson:{lesson_id}:version'
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    """
+    Returns the current version for `key`, creating it if missing.
+    Versions are millisecond timestamps, so a version key that was evicted
+    or expired restarts above every version handed out before. Version keys
+    expire after CACHE_VERSION_TIMEOUT (longer than any payload TTL), so
+    keys created for ids that never existed do not pile up.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _now_ms(), settings.CACHE_VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """
+    Moves `key` to a new, strictly larger version. The new version is also
+    in a later whole second than the current one, so Last-Modified (one
+    second resolution) changes on every bump, just like the ETag; rapid
+    edits may push it a few seconds ahead of the clock.
+    """
+    version = _now_ms()
+    current = cache.get(key)
+    if current is not None:
+        version = max(version, (current // 1000 + 1) * 1000)
+    cache.set(key, version, settings.CACHE_VERSION_TIMEOUT)
+    return version
+
+
+def get_or_build(key, version_key, build, timeout=None, version=None):
+    """
+    Returns the payload cached for the current version of `version_key`
+    (or the explicit `version`), calling `build()` and caching its result
+    on a miss.
+    """
+    if version is None:
+        version = get_version(version_key)
+    data = cache.get(key, version=version)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout or settings.COURSE_CACHE_TIMEOUT, version=version)
+    return data
+
+
+def versioned_condition(version_key_func, encoding_func=None):
+    """
+    Conditional GET for views cached under a version key.
+
+    The ETag is the version and Last-Modified is the time it was bumped,
+    so `If-None-Match` / `If-Modified-Since` are answered with a 304 after
+    a single cache read, before any ORM or serializer work.
+    `version_key_func` receives the view's URL kwargs. Views that serve
+    several content encodings pass `encoding_func(request)`, so each
+    encoding gets its own strong ETag and every response, 304s included,
+    varies on Accept-Encoding.
+    """
+    def version(request, *args, **kwargs):
+        if getattr(request, '_cache_version', None) is None:
+            request._cache_version = get_version(version_key_func(**kwargs))
+        return request._cache_version
+
+    def etag(request, *args, **kwargs):
+        tag = f'v{version(request, *args, **kwargs)}'
+        if encoding_func is not None:
+            tag = f'{tag}-{encoding_func(request)}'
+        return f'"{tag}"'
+
+    def last_modified(request, *args, **kwargs):
+        return datetime.fromtimestamp(version(request, *args, **kwargs) // 1000, tz=timezone.utc)
+
+    def decorator(view):
+        conditional = condition(etag_func=etag, last_modified_func=last_modified)(view)
+        if encoding_func is None:
+            return conditional
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # 304s skip the view, so they need the same Vary as the 200.
+            response = conditional(request, *args, **kwargs)
+            patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+        return wrapper
+
+    return method_decorator(decorator)
@@ -0,0 +1,143 @@
+"""
+Lesson content pipeline.
+
+Lesson HTML is sanitized and minified once, when it is saved, and the
+lesson payload is stored pre-compressed (see snapshots.py), so serving a
+lesson never parses or compresses anything per request.
+"""
+import gzip
+import html
+import re
+from html.parser import HTMLParser
+
+import nh3
+
+try:
+    import brotli
+except ImportError:  # Optional: without it lessons are served gzip-only.
+    brotli = None
+
+# Allowlist for lesson HTML: anything not listed here is removed.
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'div', 'span', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's', 'del', 'ins', 'mark', 'small', 'sub', 'sup',
+    'code', 'pre', 'kbd', 'samp', 'var', 'blockquote', 'q', 'cite', 'abbr',
+    'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'a', 'img', 'figure', 'figcaption',
+    'table', 'caption', 'colgroup', 'col', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td',
+    'details', 'summary',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'class', 'title', 'lang'},
+    'a': {'href'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'ol': {'start'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'abbr': {'title'},
+}
+ALLOWED_URL_SCHEMES = {'http', 'https', 'mailto'}
+# Removed together with everything inside them.
+DROPPED_TAGS = {'script', 'style', 'template', 'noscript', 'iframe', 'object', 'title'}
+
+VOID_TAGS = {'area', 'br', 'col', 'hr', 'img', 'wbr'}
+# Whitespace is significant inside these (code samples).
+PREFORMATTED_TAGS = {'pre', 'code'}
+WHITESPACE = re.compile(r'\s+')
+
+
+class _HTMLMinifier(HTMLParser):
+    """Collapses whitespace outside <pre>/<code> in already-sanitized HTML."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.out = []
+        self.preformatted_depth = 0
+
+    def _render_tag(self, tag, attrs, self_closing=False):
+        parts = [tag]
+        for name, value in attrs:
+            if value is None:
+                parts.append(name)
+            else:
+                parts.append(f'{name}="{html.escape(value, quote=True)}"')
+        return '<' + ' '.join(parts) + ('/>' if self_closing else '>')
+
+    def handle_starttag(self, tag, attrs):
+        if tag in PREFORMATTED_TAGS:
+            self.preformatted_depth += 1
+        self.out.append(self._render_tag(tag, attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.out.append(self._render_tag(tag, attrs, self_closing=True))
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if tag in PREFORMATTED_TAGS and self.preformatted_depth:
+            self.preformatted_depth -= 1
+        self.out.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if not self.preformatted_depth:
+            data = WHITESPACE.sub(' ', data)
+        self.out.append(html.escape(data, quote=False))
+
+    def handle_entityref(self, name):
+        self.out.append(f'&{name};')
+
+    def handle_charref(self, name):
+        self.out.append(f'&#{name};')
+
+
+def clean_lesson_html(content):
+    """
+    Sanitizes and minifies lesson HTML.
+    Keeps only ALLOWED_TAGS / ALLOWED_ATTRIBUTES and http(s)/mailto URLs
+    (nh3), drops comments, then collapses whitespace outside <pre>/<code>.
+    """
+    sanitized = nh3.clean(
+        content or '',
+        tags=ALLOWED_TAGS,
+        clean_content_tags=DROPPED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes=ALLOWED_URL_SCHEMES,
+        link_rel=None,
+        strip_comments=True,
+    )
+    minifier = _HTMLMinifier()
+    minifier.feed(sanitized)
+    minifier.close()
+    return ''.join(minifier.out).strip()
+
+
+def compress_variants(payload):
+    """Returns {'gzip': bytes, 'br': bytes or None} for `payload` bytes."""
+    return {
+        'gzip': gzip.compress(payload, compresslevel=9, mtime=0),
+        'br': brotli.compress(payload, quality=11) if brotli else None,
+    }
+
+
+def preferred_encoding(accept_encoding):
+    """
+    Picks 'br', 'gzip' or 'identity' from an Accept-Encoding header,
+    honouring q-values and preferring brotli on ties.
+    """
+    weights = {}
+    for item in (accept_encoding or '').split(','):
+        token, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            weights[token.lower()] = q
+
+    candidates = ['br', 'gzip'] if brotli else ['gzip']
+    best = max(candidates, key=lambda enc: weights.get(enc, weights.get('*', 0.0)))
+    if weights.get(best, weights.get('*', 0.0)) > 0:
+        return best
+    return 'identity'
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from courses.cache import CATALOG_VERSION_KEY, bump_version, subject_version_key, lesson_version_key
+from courses.models import Subject, Lesson
+from courses.snapshots import rebuild_snapshots, rebuild_lesson_snapshots
+
+
+class Command(BaseCommand):
+    help = "Re-renders the pre-built outline and lesson payloads of every subject (or the given slugs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help="Only rebuild these subjects")
+
+    def handle(self, *args, **options):
+        subjects = Subject.objects.all()
+        if options['slugs']:
+            subjects = subjects.filter(slug__in=options['slugs'])
+        subjects = list(subjects.values_list('pk', 'slug'))
+
+        subject_ids = [pk for pk, _ in subjects]
+        lesson_ids = list(Lesson.objects.filter(topic__subject_id__in=subject_ids).values_list('pk', flat=True))
+
+        written = rebuild_snapshots(subject_ids)
+        lessons_written = rebuild_lesson_snapshots(lesson_ids)
+        for _, slug in subjects:
+            bump_version(subject_version_key(slug))
+        for lesson_id in lesson_ids:
+            bump_version(lesson_version_key(lesson_id))
+        bump_version(CATALOG_VERSION_KEY)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} catalog snapshot(s) and {lessons_written} lesson snapshot(s)"
+        ))
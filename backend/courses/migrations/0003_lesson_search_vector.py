@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:38
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Lesson.search_vector is computed in the database so every write path
+# (admin, ORM, raw SQL, fixtures) keeps it current:
+#   A: title, B: content_html with tags stripped, C: code examples.
+# Code example changes touch their lesson row, which re-runs the lesson trigger.
+FORWARD_SQL = """
+CREATE OR REPLACE FUNCTION courses_lesson_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', regexp_replace(coalesce(NEW.content_html, ''), '<[^>]*>', ' ', 'g')), 'B') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT string_agg(code_text, ' ') FROM courses_codeexample WHERE lesson_id = NEW.id), ''
+        )), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER courses_lesson_search_vector_update
+    BEFORE INSERT OR UPDATE ON courses_lesson
+    FOR EACH ROW EXECUTE FUNCTION courses_lesson_search_vector();
+
+CREATE OR REPLACE FUNCTION courses_codeexample_touch_lesson() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE courses_lesson SET search_vector = NULL WHERE id = OLD.lesson_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE courses_lesson SET search_vector = NULL WHERE id = NEW.lesson_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER courses_codeexample_search_vector_update
+    AFTER INSERT OR UPDATE OR DELETE ON courses_codeexample
+    FOR EACH ROW EXECUTE FUNCTION courses_codeexample_touch_lesson();
+
+CREATE INDEX courses_lesson_search_vector_gin ON courses_lesson USING gin (search_vector);
+
+-- Backfill: any update re-runs the trigger.
+UPDATE courses_lesson SET search_vector = NULL;
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS courses_lesson_search_vector_gin;
+DROP TRIGGER IF EXISTS courses_codeexample_search_vector_update ON courses_codeexample;
+DROP FUNCTION IF EXISTS courses_codeexample_touch_lesson();
+DROP TRIGGER IF EXISTS courses_lesson_search_vector_update ON courses_lesson;
+DROP FUNCTION IF EXISTS courses_lesson_search_vector();
+"""
+
+
+def run_postgres_sql(sql):
+    def operation(apps, schema_editor):
+        # Triggers and the GIN index are Postgres-only.
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_catalogsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_postgres_sql(FORWARD_SQL), run_postgres_sql(REVERSE_SQL)),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_lesson_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonSnapshot',
+            fields=[
+                ('lesson', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='courses.lesson')),
+                ('payload', models.BinaryField()),
+                ('payload_gzip', models.BinaryField()),
+                ('payload_br', models.BinaryField(null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
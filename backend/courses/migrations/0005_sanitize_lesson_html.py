@@ -0,0 +1,52 @@
+import nh3
+from django.db import migrations
+
+# Frozen copy of the allowlist in courses/content.py at the time of this
+# migration, so later edits to the app code do not change what it does.
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'div', 'span', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's', 'del', 'ins', 'mark', 'small', 'sub', 'sup',
+    'code', 'pre', 'kbd', 'samp', 'var', 'blockquote', 'q', 'cite', 'abbr',
+    'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'a', 'img', 'figure', 'figcaption',
+    'table', 'caption', 'colgroup', 'col', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td',
+    'details', 'summary',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'class', 'title', 'lang'},
+    'a': {'href'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'ol': {'start'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'abbr': {'title'},
+}
+DROPPED_TAGS = {'script', 'style', 'template', 'noscript', 'iframe', 'object', 'title'}
+
+
+def sanitize_existing_lessons(apps, schema_editor):
+    # New saves are cleaned in Lesson.save(); bring stored rows in line once.
+    # Run `rebuild_catalog_snapshots` afterwards to refresh LessonSnapshot payloads.
+    Lesson = apps.get_model('courses', 'Lesson')
+    for lesson in Lesson.objects.only('id', 'content_html').iterator():
+        cleaned = nh3.clean(
+            lesson.content_html or '',
+            tags=ALLOWED_TAGS,
+            clean_content_tags=DROPPED_TAGS,
+            attributes=ALLOWED_ATTRIBUTES,
+            url_schemes={'http', 'https', 'mailto'},
+            link_rel=None,
+            strip_comments=True,
+        )
+        if cleaned != lesson.content_html:
+            Lesson.objects.filter(pk=lesson.pk).update(content_html=cleaned)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_lessonsnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(sanitize_existing_lessons, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from .content import clean_lesson_html
 
 class Subject(models.Model):
     title = models.CharField(max_length=255)
@@ -31,6 +33,14 @@ class Lesson(models.Model):
     content_html = models.TextField()
     difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, default='beginner')
     estimated_time = models.IntegerField(help_text="Estimated time in minutes")
+    # Maintained by a Postgres trigger from title, tag-stripped content and
+    # code examples (migration 0003). Never written from Python.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        # Sanitize and minify once here instead of on every read.
+        self.content_html = clean_lesson_html(self.content_html)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -42,3 +52,30 @@ class CodeExample(models.Model):
 
     def __str__(self):
         return f"Code for {self.lesson.title}"
+
+class CatalogSnapshot(models.Model):
+    """
+    Pre-rendered JSON outline of one Subject (see snapshots.py).
+    Regenerated whenever the subject's content changes, so the catalog
+    endpoints can return these bytes without touching the serializer.
+    """
+    subject = models.OneToOneField(Subject, related_name='snapshot', on_delete=models.CASCADE, primary_key=True)
+    payload = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of {self.subject_id}"
+
+class LessonSnapshot(models.Model):
+    """
+    Rendered LessonDetail payload, stored as JSON plus gzip and brotli
+    variants so the view can send whichever the client accepts as-is.
+    """
+    lesson = models.OneToOneField(Lesson, related_name='snapshot', on_delete=models.CASCADE, primary_key=True)
+    payload = models.BinaryField()
+    payload_gzip = models.BinaryField()
+    payload_br = models.BinaryField(null=True) # Empty when brotli is not installed
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of lesson {self.lesson_id}"
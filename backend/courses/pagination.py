@@ -0,0 +1,33 @@
+from django.utils.http import urlencode
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class SubjectCursorPagination(CursorPagination):
+    """Keyset pagination over subjects by id (the snapshot primary key)."""
+    ordering = 'subject_id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def page_key(self, request):
+        """
+        Cache key for the page `request` asks for, from the decoded cursor
+        and the clamped page size only, so extra query parameters or Host
+        headers cannot mint new cache entries. Raises NotFound for a
+        malformed cursor.
+        """
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            return f'first:{self.get_page_size(request)}'
+        if cursor.position is not None and not cursor.position.isdigit():
+            raise NotFound(self.invalid_cursor_message)  # positions are subject ids
+        return f'{cursor.offset}:{int(cursor.reverse)}:{cursor.position}:{self.get_page_size(request)}'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = super().paginate_queryset(queryset, request, view)
+        # Links are relative and keep only page_size, matching page_key().
+        self.base_url = request.path
+        if self.page_size_query_param in request.query_params:
+            self.base_url += '?' + urlencode({self.page_size_query_param: self.get_page_size(request)})
+        return page
@@ -11,7 +11,7 @@ class LessonSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Lesson
-        fields = '__all__'
+        exclude = ('search_vector',)
 
 class TopicSerializer(serializers.ModelSerializer):
     lessons = LessonSerializer(many=True, read_only=True)
@@ -26,3 +26,33 @@ class SubjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Subject
         fields = '__all__'
+
+# Outline serializers: the table of contents only.
+# Lesson bodies and code examples are fetched through LessonDetail.
+
+class LessonOutlineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Lesson
+        fields = ('id', 'title', 'difficulty', 'estimated_time')
+
+class TopicOutlineSerializer(serializers.ModelSerializer):
+    lessons = LessonOutlineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Topic
+        fields = ('id', 'title', 'order_index', 'lessons')
+
+class LessonSearchResultSerializer(serializers.ModelSerializer):
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True) # Matched terms wrapped in <mark>
+
+    class Meta:
+        model = Lesson
+        fields = ('id', 'topic', 'title', 'difficulty', 'estimated_time', 'rank', 'headline')
+
+class SubjectOutlineSerializer(serializers.ModelSerializer):
+    topics = TopicOutlineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Subject
+        fields = ('id', 'title', 'description', 'slug', 'topics')
@@ -0,0 +1,83 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+
+from .models import Subject, Topic, Lesson, CodeExample
+from .cache import CATALOG_VERSION_KEY, subject_version_key, lesson_version_key, bump_version
+from .snapshots import rebuild_snapshots, rebuild_lesson_snapshots
+
+COURSE_MODELS = (Subject, Topic, Lesson, CodeExample)
+
+
+NOTHING_AFFECTED = (set(), set(), set())
+
+
+def affected_by(instance):
+    """
+    Returns (cache version keys, subject ids, lesson ids) whose cached
+    payloads or snapshots are stale after a change to `instance`.
+    The outline (catalog + subject detail) shows subjects, topics and
+    lesson headers; code examples only appear in the lesson detail.
+    """
+    try:
+        if isinstance(instance, Subject):
+            return {CATALOG_VERSION_KEY, subject_version_key(instance.slug)}, {instance.pk}, set()
+        if isinstance(instance, Topic):
+            return {CATALOG_VERSION_KEY, subject_version_key(instance.subject.slug)}, {instance.subject_id}, set()
+        if isinstance(instance, Lesson):
+            subject = instance.topic.subject
+            keys = {CATALOG_VERSION_KEY, subject_version_key(subject.slug), lesson_version_key(instance.pk)}
+            return keys, {subject.pk}, {instance.pk}
+        if isinstance(instance, CodeExample):
+            return {lesson_version_key(instance.lesson_id)}, set(), {instance.lesson_id}
+    except ObjectDoesNotExist:
+        # Parent already gone (cascade delete); its own signal covers it.
+        pass
+    return NOTHING_AFFECTED
+
+
+def refresh_on_commit(keys, subject_ids, lesson_ids):
+    def refresh():
+        # Snapshots first, so readers that see the new version get fresh bytes.
+        if subject_ids:
+            rebuild_snapshots(subject_ids)
+        if lesson_ids:
+            rebuild_lesson_snapshots(lesson_ids)
+        for key in keys:
+            bump_version(key)
+
+    if keys or subject_ids or lesson_ids:
+        # Run after commit, so a concurrent reader cannot cache the
+        # pre-save rows under the new version.
+        transaction.on_commit(refresh)
+
+
+def remember_previous(sender, instance, raw=False, **kwargs):
+    """Keeps what the stored row affected, in case a slug or parent changes."""
+    if raw or instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    instance._previously_affected = affected_by(previous) if previous else NOTHING_AFFECTED
+
+
+def refresh_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = affected_by(instance)
+    previous = getattr(instance, '_previously_affected', NOTHING_AFFECTED)
+    refresh_on_commit(*(now | before for now, before in zip(current, previous)))
+
+
+def remember_deleted(sender, instance, **kwargs):
+    instance._previously_affected = affected_by(instance)
+
+
+def refresh_on_delete(sender, instance, **kwargs):
+    refresh_on_commit(*getattr(instance, '_previously_affected', NOTHING_AFFECTED))
+
+
+for model in COURSE_MODELS:
+    pre_save.connect(remember_previous, sender=model)
+    post_save.connect(refresh_on_save, sender=model)
+    pre_delete.connect(remember_deleted, sender=model)
+    post_delete.connect(refresh_on_delete, sender=model)
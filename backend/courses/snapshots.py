@@ -0,0 +1,103 @@
+"""
+Denormalized catalog and lesson snapshots.
+
+Each Subject's outline is rendered to JSON once, when its content changes,
+and stored in CatalogSnapshot. SubjectList/SubjectDetail then read those
+bytes (one indexed query on a cache miss) instead of walking the
+Subject -> Topic -> Lesson tree and serializing it per request.
+
+Lessons get the same treatment in LessonSnapshot, plus pre-compressed
+variants of the payload (see content.py).
+"""
+import json
+
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from .models import Subject, Topic, Lesson, CatalogSnapshot, LessonSnapshot
+from .serializers import SubjectOutlineSerializer, LessonSerializer
+from .content import compress_variants
+from .pagination import SubjectCursorPagination
+
+
+def subject_outline_queryset():
+    """
+    Subjects with their topics and lesson headers prefetched.
+    Three queries in total, however many topics and lessons there are.
+    """
+    lessons = Lesson.objects.only('id', 'topic_id', 'title', 'difficulty', 'estimated_time').order_by('id')
+    topics = Topic.objects.only('id', 'subject_id', 'title', 'order_index').prefetch_related(
+        Prefetch('lessons', queryset=lessons)
+    )
+    return Subject.objects.prefetch_related(Prefetch('topics', queryset=topics)).order_by('id')
+
+
+def rebuild_snapshots(subject_ids):
+    """Re-renders the snapshots of the given subjects. Returns how many were written."""
+    subjects = subject_outline_queryset().filter(pk__in=subject_ids)
+    renderer = JSONRenderer()
+    written = 0
+    for subject in subjects:
+        payload = renderer.render(SubjectOutlineSerializer(subject).data).decode()
+        CatalogSnapshot.objects.update_or_create(subject=subject, defaults={'payload': payload})
+        written += 1
+    return written
+
+
+def subject_payload(slug):
+    """JSON bytes for one subject's outline, or None if there is no such subject."""
+    payload = CatalogSnapshot.objects.filter(subject__slug=slug).values_list('payload', flat=True).first()
+    if payload is None:
+        subject_id = Subject.objects.filter(slug=slug).values_list('pk', flat=True).first()
+        if subject_id is None or not rebuild_snapshots([subject_id]):
+            return None
+        payload = CatalogSnapshot.objects.values_list('payload', flat=True).get(subject_id=subject_id)
+    return payload.encode()
+
+
+def catalog_payload(request):
+    """
+    JSON bytes for one cursor page of subject outlines, ordered by id:
+    {"next": ..., "previous": ..., "results": [...]}
+    """
+    missing = list(Subject.objects.filter(snapshot__isnull=True).values_list('pk', flat=True))
+    if missing:
+        rebuild_snapshots(missing)
+
+    paginator = SubjectCursorPagination()
+    page = paginator.paginate_queryset(CatalogSnapshot.objects.only('subject_id', 'payload'), request)
+    links = json.dumps({'next': paginator.get_next_link(), 'previous': paginator.get_previous_link()})
+    results = ','.join(snapshot.payload for snapshot in page)
+    return (links[:-1] + ',"results":[' + results + ']}').encode()
+
+
+LESSON_PAYLOAD_COLUMNS = {'identity': 'payload', 'gzip': 'payload_gzip', 'br': 'payload_br'}
+
+
+def rebuild_lesson_snapshots(lesson_ids):
+    """Re-renders and re-compresses the given lessons. Returns how many were written."""
+    lessons = Lesson.objects.filter(pk__in=lesson_ids).prefetch_related('examples')
+    renderer = JSONRenderer()
+    written = 0
+    for lesson in lessons:
+        payload = renderer.render(LessonSerializer(lesson).data)
+        variants = compress_variants(payload)
+        LessonSnapshot.objects.update_or_create(lesson=lesson, defaults={
+            'payload': payload,
+            'payload_gzip': variants['gzip'],
+            'payload_br': variants['br'],
+        })
+        written += 1
+    return written
+
+
+def lesson_payload(lesson_id, encoding='identity'):
+    """The lesson's JSON payload in `encoding`, or None if there is no such lesson."""
+    rows = LessonSnapshot.objects.filter(lesson_id=lesson_id).values_list(LESSON_PAYLOAD_COLUMNS[encoding])
+    row = rows.first()
+    # Also rebuild when the variant is missing (brotli was not installed at build time).
+    if row is None or row[0] is None:
+        if not rebuild_lesson_snapshots([lesson_id]):
+            return None
+        row = rows.first()
+    return bytes(row[0])
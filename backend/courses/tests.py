@@ -1,3 +1,286 @@
-from django.test import TestCase
+import gzip
+from unittest import skipUnless
+from unittest.mock import ANY, patch
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from .cache import get_version, lesson_version_key
+from .models import Subject, Topic, Lesson, CodeExample, CatalogSnapshot
+from .snapshots import subject_outline_queryset, rebuild_snapshots
+from .content import clean_lesson_html, preferred_encoding
+
+
+class CourseApiTestCase(APITestCase):
+    """Builds a small Subject -> Topic -> Lesson tree for course tests."""
+    
+    def setUp(self):
+        cache.clear()
+        self.subject = Subject.objects.create(title='Python', description='Learn Python', slug='python')
+        self.lessons = []
+        for t in range(3):
+            topic = Topic.objects.create(subject=self.subject, title=f'Topic {t}', order_index=t)
+            for l in range(2):
+                lesson = Lesson.objects.create(
+                    topic=topic,
+                    title=f'Lesson {t}.{l}',
+                    content_html='<p>Body</p>',
+                    estimated_time=10,
+                )
+                CodeExample.objects.create(lesson=lesson, language='python', code_text='print(1)')
+                self.lessons.append(lesson)
+
+
+class SubjectOutlineTests(CourseApiTestCase):
+    """Tests for the subject list/detail outline."""
+    
+    def test_detail_returns_outline_without_content(self):
+        """Test that lessons are listed without their HTML or examples."""
+        response = self.client.get('/courses/subjects/python/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        lesson = response.json()['topics'][0]['lessons'][0]
+        self.assertEqual(set(lesson), {'id', 'title', 'difficulty', 'estimated_time'})
+    
+    def test_outline_query_count_is_constant(self):
+        """Test that the outline is built without per-topic queries."""
+        with self.assertNumQueries(3):
+            subjects = list(subject_outline_queryset())
+            lessons = [l for t in subjects[0].topics.all() for l in t.lessons.all()]
+        self.assertEqual(len(lessons), 6)
+    
+    def test_lesson_detail_includes_content(self):
+        """Test that full lesson content is still served by LessonDetail."""
+        response = self.client.get(f'/courses/lessons/{self.lessons[0].pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['content_html'], '<p>Body</p>')
+        self.assertEqual(len(response.json()['examples']), 1)
+
+
+class CourseCacheInvalidationTests(CourseApiTestCase):
+    """Tests for signal-driven cache versioning."""
+    
+    def test_cached_outline_skips_database(self):
+        """Test that a warm cache serves the outline with no queries."""
+        self.client.get('/courses/subjects/python/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/courses/subjects/python/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_lesson_edit_invalidates_outline_and_lesson(self):
+        """Test that renaming a lesson is visible immediately."""
+        lesson = self.lessons[0]
+        self.client.get('/courses/subjects/python/')
+        self.client.get(f'/courses/lessons/{lesson.pk}/')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.title = 'Renamed'
+            lesson.save()
+        
+        outline = self.client.get('/courses/subjects/python/')
+        self.assertEqual(outline.json()['topics'][0]['lessons'][0]['title'], 'Renamed')
+        detail = self.client.get(f'/courses/lessons/{lesson.pk}/')
+        self.assertEqual(detail.json()['title'], 'Renamed')
+    
+    def test_code_example_edit_only_invalidates_its_lesson(self):
+        """Test that code example edits leave the outline cached."""
+        lesson = self.lessons[0]
+        self.client.get('/courses/subjects/python/')
+        self.client.get(f'/courses/lessons/{lesson.pk}/')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            example = lesson.examples.get()
+            example.code_text = 'print(2)'
+            example.save()
+        
+        with self.assertNumQueries(0):
+            self.client.get('/courses/subjects/python/')
+        detail = self.client.get(f'/courses/lessons/{lesson.pk}/')
+        self.assertEqual(detail.json()['examples'][0]['code_text'], 'print(2)')
+    
+    def test_slug_change_invalidates_old_slug(self):
+        """Test that the old slug stops serving a cached subject."""
+        self.client.get('/courses/subjects/python/')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.slug = 'python-3'
+            self.subject.save()
+        
+        response = self.client.get('/courses/subjects/python/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_version_keys_expire(self):
+        """Test that version keys, even for unknown ids, are created with a timeout."""
+        with patch.object(cache, 'add', wraps=cache.add) as add:
+            get_version(lesson_version_key(999999))
+        add.assert_called_once_with(lesson_version_key(999999), ANY, settings.CACHE_VERSION_TIMEOUT)
+
+
+class CatalogSnapshotTests(CourseApiTestCase):
+    """Tests for pre-rendered catalog snapshots."""
+    
+    def setUp(self):
+        super().setUp()
+        rebuild_snapshots([self.subject.pk])
+    
+    def test_list_is_served_from_snapshots(self):
+        """Test that a cold cache reads snapshot rows, not the course tree."""
+        with self.assertNumQueries(2):
+            response = self.client.get('/courses/subjects/')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['results'][0]['slug'], 'python')
+    
+    def test_list_is_cursor_paginated(self):
+        """Test that subjects are paged by id with an opaque cursor."""
+        for i in range(2):
+            Subject.objects.create(title=f'Subject {i}', description='', slug=f'subject-{i}')
+        
+        first = self.client.get('/courses/subjects/', {'page_size': 2}).json()
+        self.assertEqual([s['slug'] for s in first['results']], ['python', 'subject-0'])
+        self.assertIsNone(first['previous'])
+        
+        second = self.client.get(first['next']).json()
+        self.assertEqual([s['slug'] for s in second['results']], ['subject-1'])
+        self.assertIsNone(second['next'])
+    
+    def test_list_cache_ignores_extra_query_params_and_host(self):
+        """Test that junk query params and Host headers reuse the same page entry."""
+        self.client.get('/courses/subjects/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/courses/subjects/', {'x': '1'}, HTTP_HOST='attacker.test')
+        self.assertEqual(response.json()['results'][0]['slug'], 'python')
+        self.assertEqual(self.client.get('/courses/subjects/', {'cursor': 'cD1hYmM='}).status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_detail_is_served_from_snapshot(self):
+        """Test that a cold cache reads one snapshot row."""
+        with self.assertNumQueries(1):
+            response = self.client.get('/courses/subjects/python/')
+        self.assertEqual(len(response.json()['topics']), 3)
+    
+    def test_topic_change_rebuilds_snapshot(self):
+        """Test that editing content regenerates the subject's snapshot."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Topic.objects.create(subject=self.subject, title='New topic', order_index=9)
+        
+        snapshot = CatalogSnapshot.objects.get(subject=self.subject)
+        self.assertIn('New topic', snapshot.payload)
+    
+    def test_missing_subject_is_not_found(self):
+        """Test that unknown slugs are a 404 and are not cached."""
+        response = self.client.get('/courses/subjects/rust/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalGetTests(CourseApiTestCase):
+    """Tests for ETag / Last-Modified on course endpoints."""
+    
+    def test_matching_etag_returns_304_without_queries(self):
+        """Test that If-None-Match short-circuits before the ORM."""
+        response = self.client.get(f'/courses/lessons/{self.lessons[0].pk}/')
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/courses/lessons/{self.lessons[0].pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn('Accept-Encoding', response['Vary'])
+    
+    def test_etag_changes_when_content_changes(self):
+        """Test that an edit produces a new ETag and a full response."""
+        etag = self.client.get('/courses/subjects/')['ETag']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.title = 'Python 3'
+            self.subject.save()
+        
+        response = self.client.get('/courses/subjects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_last_modified_changes_for_edits_within_a_second(self):
+        """Test that an If-Modified-Since-only client sees an edit made in the same second."""
+        url = f'/courses/lessons/{self.lessons[0].pk}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lessons[0].title = 'Renamed'
+            self.lessons[0].save()
+        
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+
+
+class LessonContentTests(CourseApiTestCase):
+    """Tests for sanitized, pre-compressed lesson delivery."""
+    
+    def test_html_is_sanitized_and_minified_on_save(self):
+        """Test that scripts, handlers and javascript: URLs are removed."""
+        cleaned = clean_lesson_html(
+            '<p onclick="x()">Hi   <a href="javascript:alert(1)">there</a></p>\n'
+            '<script>alert(1)</script><!-- note --><pre>a\n  b</pre>'
+        )
+        self.assertEqual(cleaned, '<p>Hi <a>there</a></p> <pre>a\n  b</pre>')
+    
+    def test_html_outside_the_allowlist_is_removed(self):
+        """Test that redirect and styling vectors a denylist would miss are stripped."""
+        cleaned = clean_lesson_html(
+            '<meta http-equiv="refresh" content="0;url=https://evil.test"><base href="https://evil.test/">'
+            '<form action="https://evil.test"><input name="q">Find</form>'
+            '<svg><a xlink:href="javascript:alert(1)">svg</a></svg>'
+            '<p style="background:url(https://evil.test)">Styled</p>'
+            '<img src="data:text/html,x" alt="pic"><a href="/courses/lessons/2/">Next</a>'
+        )
+        self.assertEqual(cleaned, 'Find<p>Styled</p><img alt="pic"><a href="/courses/lessons/2/">Next</a>')
+    
+    def test_encoding_negotiation(self):
+        """Test Accept-Encoding parsing with q-values."""
+        self.assertEqual(preferred_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(preferred_encoding('gzip;q=0, identity'), 'identity')
+        self.assertEqual(preferred_encoding(None), 'identity')
+    
+    def test_gzip_variant_is_served(self):
+        """Test that gzip clients get the stored gzip bytes."""
+        url = f'/courses/lessons/{self.lessons[0].pk}/'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotEqual(response['ETag'], plain['ETag'])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Full-text search needs Postgres')
+class LessonSearchTests(CourseApiTestCase):
+    """Tests for /courses/search/."""
+    
+    def test_search_ranks_title_matches_first(self):
+        """Test that title hits outrank body hits and carry a headline."""
+        self.lessons[0].content_html = '<p>Generators produce values lazily.</p>'
+        self.lessons[0].save()
+        self.lessons[1].title = 'Generators'
+        self.lessons[1].save()
+        
+        response = self.client.get('/courses/search/', {'q': 'generators'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in response.data], [self.lessons[1].pk, self.lessons[0].pk])
+        self.assertIn('<mark>Generators</mark>', response.data[1]['headline'])
+    
+    def test_code_examples_are_searchable(self):
+        """Test that code example edits reach the lesson's search vector."""
+        example = self.lessons[2].examples.get()
+        example.code_text = 'import asyncio'
+        example.save()
+        
+        response = self.client.get('/courses/search/', {'q': 'asyncio'})
+        self.assertEqual([r['id'] for r in response.data], [self.lessons[2].pk])
+    
+    def test_query_is_required(self):
+        """Test that an empty query is rejected."""
+        response = self.client.get('/courses/search/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import SubjectList, SubjectDetail, LessonDetail
+from .views import SubjectList, SubjectDetail, LessonDetail, LessonSearch
 
 urlpatterns = [
     path('subjects/', SubjectList.as_view(), name='subject-list'),
     path('subjects/<slug:slug>/', SubjectDetail.as_view(), name='subject-detail'),
     path('lessons/<int:pk>/', LessonDetail.as_view(), name='lesson-detail'),
+    path('search/', LessonSearch.as_view(), name='lesson-search'),
 ]
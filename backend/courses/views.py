@@ -1,45 +1,119 @@
 from rest_framework import generics
-from .models import Subject, Topic, Lesson
-from .serializers import SubjectSerializer, TopicSerializer, LessonSerializer
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchHeadline
+from django.db.models import F, Func, Value
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from .models import Lesson
+from .serializers import LessonSearchResultSerializer
+from .cache import CATALOG_VERSION_KEY, subject_version_key, lesson_version_key, get_or_build, versioned_condition
+from .content import preferred_encoding
+from .pagination import SubjectCursorPagination
+from .snapshots import catalog_payload, subject_payload, lesson_payload
 
-class SubjectList(generics.ListAPIView):
+def request_encoding(request):
+    return preferred_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+
+class SubjectList(APIView):
     """
-    Returns a list of all available subjects.
+    Returns a cursor-paginated list of subjects with their outline
+    (topics and lesson titles, no lesson content).
     
     Performance Note:
-    - Cached for 1 hour to reduce DB load.
+    - Served from pre-rendered snapshots (snapshots.py); no serializer runs per request.
+    - Cached in Redis until course content changes (see cache.py / signals.py).
+    - ETag/Last-Modified follow the cache version; unchanged clients get a 304.
     - This is the landing page data, so high traffic is expected.
     """
-    queryset = Subject.objects.all()
-    serializer_class = SubjectSerializer
 
-    @method_decorator(cache_page(60 * 60)) # Cache for 1 hour
+    @versioned_condition(lambda **kwargs: CATALOG_VERSION_KEY)
     def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+        # One cache entry per page, keyed on the validated cursor and page size.
+        page_key = SubjectCursorPagination().page_key(request)
+        payload = get_or_build(
+            f'courses:subject-list:{page_key}',
+            CATALOG_VERSION_KEY,
+            lambda: catalog_payload(request),
+        )
+        return HttpResponse(payload, content_type='application/json')
 
-class SubjectDetail(generics.RetrieveAPIView):
+class SubjectDetail(APIView):
     """
-    Returns details of a specific subject, including its topics.
+    Returns the outline of a specific subject: its topics and lesson headers.
     Also cached because the structure of a course rarely changes.
     """
-    queryset = Subject.objects.all()
-    serializer_class = SubjectSerializer
-    lookup_field = 'slug'
 
-    @method_decorator(cache_page(60 * 60))
-    def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+    @versioned_condition(lambda slug, **kwargs: subject_version_key(slug))
+    def get(self, request, slug, *args, **kwargs):
+        def build():
+            payload = subject_payload(slug)
+            if payload is None:
+                raise Http404
+            return payload
 
-class LessonDetail(generics.RetrieveAPIView):
+        payload = get_or_build(f'courses:subject:{slug}', subject_version_key(slug), build)
+        return HttpResponse(payload, content_type='application/json')
+
+class LessonDetail(APIView):
     """
     Returns the actual content of a lesson.
     This includes HTML content and code examples.
+
+    The payload is stored pre-compressed (LessonSnapshot), so the view
+    only picks the brotli/gzip/identity bytes matching Accept-Encoding.
     """
-    queryset = Lesson.objects.all()
-    serializer_class = LessonSerializer
 
-    @method_decorator(cache_page(60 * 60))
-    def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+    @versioned_condition(lambda pk, **kwargs: lesson_version_key(pk), encoding_func=request_encoding)
+    def get(self, request, pk, *args, **kwargs):
+        encoding = request_encoding(request)
+
+        def build():
+            payload = lesson_payload(pk, encoding)
+            if payload is None:
+                raise Http404
+            return payload
+
+        payload = get_or_build(f'courses:lesson:{pk}:{encoding}', lesson_version_key(pk), build)
+        response = HttpResponse(payload, content_type='application/json')
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+class LessonSearch(generics.ListAPIView):
+    """
+    GET /courses/search/?q=<query>&limit=<n>
+
+    Full-text lesson search over the trigger-maintained `search_vector`
+    (title > content > code examples), served by its GIN index.
+    Results are ranked and carry a highlighted snippet of the content.
+    """
+    serializer_class = LessonSearchResultSerializer
+    default_limit = 20
+    max_limit = 50
+
+    def get_queryset(self):
+        q = self.request.query_params.get('q', '').strip()
+        if not q:
+            raise ValidationError({'q': 'A search query is required.'})
+        try:
+            limit = min(int(self.request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+
+        query = SearchQuery(q, search_type='websearch', config='english')
+        text = Func(F('content_html'), Value('<[^>]*>'), Value(' '), Value('g'), function='regexp_replace')
+        return (
+            Lesson.objects
+            .filter(search_vector=query)
+            .annotate(
+                rank=SearchRank(F('search_vector'), query),
+                headline=SearchHeadline(
+                    text, query, config='english',
+                    start_sel='<mark>', stop_sel='</mark>', max_words=35, min_words=15,
+                ),
+            )
+            .only('id', 'topic_id', 'title', 'difficulty', 'estimated_time')
+            .order_by('-rank', 'id')[:max(limit, 1)]
+        )
@@ -0,0 +1,69 @@
+import os
+import time
+import logging
+import threading
+
+import httpx
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorHealthMonitor:
+    """
+    Caches the executor service's /health response in process memory.
+
+    Reads are a memory lookup. Once the snapshot is older than the TTL,
+    the first reader starts a background refresh and keeps serving the
+    stale snapshot until it lands, so at most one probe per TTL leaves
+    each worker no matter how often load balancers poll us.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else settings.EXECUTOR_HEALTH_TTL
+        self._lock = threading.Lock()
+        self._snapshot = None  # (http_status, payload, fetched_at)
+
+    def get(self):
+        """Returns (http_status, payload) for the executor health."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Nothing cached yet: the first caller probes synchronously.
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._probe()
+                snapshot = self._snapshot
+        elif time.monotonic() - snapshot[2] >= self.ttl and self._lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh, daemon=True).start()
+        return snapshot[0], snapshot[1]
+
+    def reset(self):
+        self._snapshot = None
+
+    def _refresh(self):
+        try:
+            self._snapshot = self._probe()
+        finally:
+            self._lock.release()
+
+    def _probe(self):
+        executor_url = os.getenv('EXECUTOR_SERVICE_URL', 'http://localhost:8001')
+
+        try:
+            with httpx.Client(timeout=5.0) as client:
+                response = client.get(f"{executor_url}/health")
+
+            if response.status_code == 200:
+                return 200, response.json(), time.monotonic()
+            return 503, {"status": "degraded", "executor_ready": False}, time.monotonic()
+        except Exception as e:
+            logger.warning(f"Executor health probe failed: {e}")
+            return (
+                503,
+                {"status": "unavailable", "executor_ready": False, "error": str(e)},
+                time.monotonic(),
+            )
+
+
+health_monitor = ExecutorHealthMonitor()
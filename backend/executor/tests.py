@@ -110,7 +110,11 @@ class ExecuteCodeViewTests(APITestCase):
 class ExecutorHealthViewTests(APITestCase):
     """Tests for executor health endpoint."""
     
-    @patch('executor.views.httpx.Client')
+    def setUp(self):
+        from .health import health_monitor
+        health_monitor.reset()
+    
+    @patch('executor.health.httpx.Client')
     def test_health_check_success(self, mock_client):
         """Test health check when executor is available."""
         mock_response = MagicMock()
@@ -126,7 +130,7 @@ class ExecutorHealthViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['status'], 'healthy')
     
-    @patch('executor.views.httpx.Client')
+    @patch('executor.health.httpx.Client')
     def test_health_check_failure(self, mock_client):
         """Test health check when executor is unavailable."""
         import httpx
@@ -134,3 +138,60 @@ class ExecutorHealthViewTests(APITestCase):
         
         response = self.client.get('/api/execute/health/')
         self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    @patch('executor.health.httpx.Client')
+    def test_health_check_is_cached(self, mock_client):
+        """Test that repeated probes within the TTL reuse the snapshot."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'status': 'healthy', 'executor_ready': True}
+        mock_client.return_value.__enter__.return_value.get.return_value = mock_response
+        
+        for _ in range(3):
+            response = self.client.get('/api/execute/health/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        mock_client.return_value.__enter__.return_value.get.assert_called_once()
+
+
+class CodeExecutionThrottleTests(APITestCase):
+    """Tests for the Redis token-bucket throttle."""
+    
+    def _request(self, role=None):
+        request = MagicMock()
+        request.META = {'REMOTE_ADDR': '127.0.0.1'}
+        request.user.is_authenticated = role is not None
+        request.user.role = role
+        request.user.pk = 'user-1'
+        return request
+    
+    def test_burst_depends_on_role(self):
+        """Test that instructors get a larger bucket than students."""
+        from .throttling import CodeExecutionThrottle
+        throttle = CodeExecutionThrottle()
+        self.assertEqual(throttle.get_burst(self._request('student')), 30)
+        self.assertEqual(throttle.get_burst(self._request('instructor')), 60)
+    
+    @patch('executor.throttling.get_redis_connection')
+    def test_bucket_is_checked_in_one_script_call(self, mock_conn):
+        """Test that the Lua script receives refill rate and role burst."""
+        from .throttling import CodeExecutionThrottle
+        script = mock_conn.return_value.register_script.return_value
+        script.return_value = [1, b'0']
+        
+        throttle = CodeExecutionThrottle()
+        self.assertTrue(throttle.allow_request(self._request('admin'), None))
+        
+        script.assert_called_once()
+        self.assertEqual(script.call_args.kwargs['keys'], ['bucket:throttle_code_execution_user-1'])
+        self.assertEqual(script.call_args.kwargs['args'], [0.5, 120])
+    
+    @patch('executor.throttling.get_redis_connection')
+    def test_empty_bucket_is_throttled(self, mock_conn):
+        """Test that an empty bucket rejects and reports the refill wait."""
+        from .throttling import CodeExecutionThrottle
+        mock_conn.return_value.register_script.return_value.return_value = [0, b'1.5']
+        
+        throttle = CodeExecutionThrottle()
+        self.assertFalse(throttle.allow_request(self._request('student'), None))
+        self.assertEqual(throttle.wait(), 1.5)
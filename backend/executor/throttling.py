@@ -0,0 +1,109 @@
+import logging
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
+
+
+logger = logging.getLogger(__name__)
+
+
+# Token bucket kept in a single Redis hash per key: {tokens, ts}.
+# Refill, take and expiry happen inside one script call, so the check is
+# atomic across every backend worker and costs a single round trip.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', string.format('%.6f', tokens), 'ts', string.format('%.6f', now))
+-- An untouched bucket is full again after capacity / rate seconds,
+-- so the key can simply expire then.
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(wait)}
+"""
+
+
+class TokenBucketThrottleMixin:
+    """
+    Redis token-bucket throttling for DRF rate throttles.
+
+    `rate` sets the refill speed, and the bucket size (burst allowance) comes
+    from `settings.CODE_EXECUTION_BURST`, looked up by `accounts.User.role`
+    ('anon' for unauthenticated requests).
+
+    If Redis is unreachable we fall back to DRF's cache-based sliding window
+    so rate limiting degrades instead of disappearing.
+    """
+    key_prefix = 'bucket:'
+
+    def get_burst(self, request):
+        bursts = getattr(settings, 'CODE_EXECUTION_BURST', {})
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            role = getattr(user, 'role', None) or 'student'
+        else:
+            role = 'anon'
+        return bursts.get(role, self.num_requests)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        refill_rate = self.num_requests / self.duration
+        capacity = self.get_burst(request)
+
+        try:
+            conn = get_redis_connection('default')
+            script = conn.register_script(TOKEN_BUCKET_LUA)
+            allowed, wait = script(keys=[self.key_prefix + self.key], args=[refill_rate, capacity])
+        except (NotImplementedError, RedisError) as e:
+            logger.warning(f"Token bucket unavailable, using cache throttle: {e}")
+            self._bucket_wait = None
+            return super().allow_request(request, view)
+
+        self._bucket_wait = float(wait)
+        return bool(int(allowed))
+
+    def wait(self):
+        bucket_wait = getattr(self, '_bucket_wait', None)
+        if bucket_wait is None:
+            return super().wait()
+        return bucket_wait
+
+
+class CodeExecutionThrottle(TokenBucketThrottleMixin, UserRateThrottle):
+    """Rate limit for authenticated users: 30/minute, burst by role"""
+    scope = 'code_execution'
+    rate = '30/minute'
+
+
+class AnonCodeExecutionThrottle(TokenBucketThrottleMixin, AnonRateThrottle):
+    """Rate limit for anonymous users: 10/minute"""
+    scope = 'anon_code_execution'
+    rate = '10/minute'
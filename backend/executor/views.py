@@ -6,26 +6,17 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from django.conf import settings
 
 from .serializers import ExecuteCodeSerializer, ExecuteResultSerializer
 from .models import ExecutionLog
+from .health import health_monitor
+from .throttling import CodeExecutionThrottle, AnonCodeExecutionThrottle
 
 
 logger = logging.getLogger(__name__)
 
 
-class CodeExecutionThrottle(UserRateThrottle):
-    """Rate limit for authenticated users: 30/minute"""
-    rate = '30/minute'
-
-
-class AnonCodeExecutionThrottle(AnonRateThrottle):
-    """Rate limit for anonymous users: 10/minute"""
-    rate = '10/minute'
-
-
 class ExecuteCodeView(APIView):
     """
     POST /api/execute/
@@ -151,26 +142,12 @@ class ExecutorHealthView(APIView):
     GET /api/execute/health/
     
     Check executor service health.
+    Served from an in-process snapshot refreshed at most every
+    EXECUTOR_HEALTH_TTL seconds (see executor/health.py).
     """
     
     permission_classes = [AllowAny]
     
     def get(self, request):
-        executor_url = os.getenv('EXECUTOR_SERVICE_URL', 'http://localhost:8001')
-        
-        try:
-            with httpx.Client(timeout=5.0) as client:
-                response = client.get(f"{executor_url}/health")
-            
-            if response.status_code == 200:
-                return Response(response.json())
-            else:
-                return Response(
-                    {"status": "degraded", "executor_ready": False},
-                    status=status.HTTP_503_SERVICE_UNAVAILABLE
-                )
-        except Exception as e:
-            return Response(
-                {"status": "unavailable", "executor_ready": False, "error": str(e)},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
+        http_status, payload = health_monitor.get()
+        return Response(payload, status=http_status)
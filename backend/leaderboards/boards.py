@@ -0,0 +1,164 @@
+"""
+Leaderboards kept in Redis sorted sets (member: user id, score: points).
+
+Points:
+- Quiz: the improvement over the user's previous best on that quiz, so a
+  quiz is worth at most its best score (100) however often it is retaken.
+- Lesson completion: +10, and -10 if a completed lesson is reopened.
+
+Every award lands on the global board, the subject's board and the
+current ISO week's board with ZINCRBY. Top-N, rank and around-me reads are
+ZREVRANGE / ZREVRANK calls: O(log n + window) however many users are
+ranked. `rebuild` recomputes every board from the database.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_POINTS = 10
+GLOBAL_KEY = 'leaderboard:global'
+SUBJECT_KEY_PREFIX = 'leaderboard:subject:'
+# Past weeks stay readable for a while, then expire on their own.
+WEEKLY_TTL = 60 * 60 * 24 * 7 * 5
+
+
+def subject_key(subject_id):
+    return f'{SUBJECT_KEY_PREFIX}{subject_id}'
+
+
+def weekly_key(when=None):
+    year, week, _ = timezone.localtime(when).isocalendar()
+    return f'leaderboard:weekly:{year}-W{week:02d}'
+
+
+def week_start(when=None):
+    local = timezone.localtime(when)
+    return (local - timedelta(days=local.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def award(user_id, points_by_subject):
+    """
+    Adds {subject_id: points} for the user to the subject, global and
+    weekly boards in one pipelined round trip. Without Redis the award is
+    skipped; `rebuild_leaderboards` catches the boards up later.
+    """
+    points_by_subject = {subject_id: points for subject_id, points in points_by_subject.items() if points}
+    if not points_by_subject:
+        return
+    member = str(user_id)
+    total = sum(points_by_subject.values())
+    weekly = weekly_key()
+    try:
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        for subject_id, points in points_by_subject.items():
+            pipe.zincrby(subject_key(subject_id), points, member)
+        if total:
+            pipe.zincrby(GLOBAL_KEY, total, member)
+            pipe.zincrby(weekly, total, member)
+            pipe.expire(weekly, WEEKLY_TTL)
+        pipe.execute()
+    except (NotImplementedError, RedisError) as e:
+        logger.warning(f"Leaderboard update skipped: {e}")
+
+
+def award_on_commit(user_id, points_by_subject):
+    """Awards once the surrounding transaction commits, so rolled back work never scores."""
+    if any(points_by_subject.values()):
+        transaction.on_commit(lambda: award(user_id, points_by_subject))
+
+
+def _entries(rows, first_rank):
+    return [
+        {'rank': first_rank + offset, 'user': member.decode(), 'points': int(score)}
+        for offset, (member, score) in enumerate(rows)
+    ]
+
+
+def top(key, limit):
+    """The first `limit` entries of a board, best first. Raises RedisError/NotImplementedError without Redis."""
+    rows = get_redis_connection('default').zrevrange(key, 0, limit - 1, withscores=True)
+    return _entries(rows, 1)
+
+
+def around(key, user_id, window):
+    """
+    The user's entry and `window` neighbours on each side, or None if the
+    user has no points on this board.
+    """
+    conn = get_redis_connection('default')
+    rank = conn.zrevrank(key, str(user_id))
+    if rank is None:
+        return None
+    start = max(0, rank - window)
+    return _entries(conn.zrevrange(key, start, rank + window, withscores=True), start + 1)
+
+
+def compute_boards(now=None):
+    """{board key: {user_id: points}} for every board, from the database."""
+    from progress.models import LessonProgress
+    from quizzes.models import QuizAttempt
+
+    since = week_start(now)
+    boards = defaultdict(lambda: defaultdict(int))
+    weekly = boards[weekly_key(now)]
+
+    # Improvements telescope: the sum of awards on a quiz is its best score,
+    # and this week's share is the best now minus the best before the week.
+    best_before_week = {
+        (row['user_id'], row['quiz_id']): row['best']
+        for row in QuizAttempt.objects.filter(attempted_at__lt=since)
+        .values('user_id', 'quiz_id').annotate(best=Max('score'))
+    }
+    for row in QuizAttempt.objects.values('user_id', 'quiz_id', 'quiz__lesson__topic__subject_id').annotate(best=Max('score')):
+        user_id, best = str(row['user_id']), row['best']
+        boards[subject_key(row['quiz__lesson__topic__subject_id'])][user_id] += best
+        boards[GLOBAL_KEY][user_id] += best
+        weekly[user_id] += best - best_before_week.get((row['user_id'], row['quiz_id']), 0)
+
+    completed = LessonProgress.objects.filter(status='completed')
+    for row in completed.values('user_id', 'lesson__topic__subject_id').annotate(n=Count('id')):
+        user_id, points = str(row['user_id']), row['n'] * COMPLETION_POINTS
+        boards[subject_key(row['lesson__topic__subject_id'])][user_id] += points
+        boards[GLOBAL_KEY][user_id] += points
+    for row in completed.filter(completed_at__gte=since).values('user_id').annotate(n=Count('id')):
+        weekly[str(row['user_id'])] += row['n'] * COMPLETION_POINTS
+
+    return {key: {user_id: points for user_id, points in board.items() if points} for key, board in boards.items()}
+
+
+def rebuild(now=None):
+    """
+    Replaces every board with its recomputed contents. Each board is
+    written under a temporary key and renamed into place, so readers never
+    see a half-built board. Returns the number of boards written.
+    """
+    boards = compute_boards(now)
+    conn = get_redis_connection('default')
+    stale = {key.decode() for key in conn.scan_iter(match=f'{SUBJECT_KEY_PREFIX}*')} - set(boards)
+    # Emptied if nobody has points any more.
+    stale.update((GLOBAL_KEY, weekly_key(now)))
+
+    for key, board in boards.items():
+        if not board:
+            continue
+        building = f'{key}:rebuilding'
+        pipe = conn.pipeline()
+        pipe.delete(building)
+        pipe.zadd(building, board)
+        pipe.rename(building, key)
+        if key.startswith('leaderboard:weekly:'):
+            pipe.expire(key, WEEKLY_TTL)
+        pipe.execute()
+        stale.discard(key)
+
+    if stale:
+        conn.delete(*stale)
+    return len(boards)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from leaderboards.boards import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recomputes the global, per-subject and current weekly leaderboards from quiz attempts and lesson progress."
+
+    def handle(self, *args, **options):
+        written = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} leaderboard(s)"))
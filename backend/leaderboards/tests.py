@@ -0,0 +1,230 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from courses.models import Subject, Topic, Lesson
+from progress.models import LessonProgress
+from quizzes.models import Quiz, Question, Answer, QuizAttempt
+from .boards import GLOBAL_KEY, subject_key, weekly_key, rebuild
+
+
+class FakeSortedSets:
+    """The sorted-set commands boards.py uses, kept in dicts (ties ordered like Redis)."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+    
+    def zincrby(self, key, amount, member):
+        board = self.data.setdefault(key, {})
+        board[member] = board.get(member, 0) + amount
+    
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+    
+    def _ordered(self, key):
+        return sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=True)
+    
+    def zrevrange(self, key, start, end, withscores=False):
+        return [(member.encode(), float(score)) for member, score in self._ordered(key)[start:end + 1]]
+    
+    def zrevrank(self, key, member):
+        members = [m for m, _ in self._ordered(key)]
+        return members.index(member) if member in members else None
+    
+    def rename(self, src, dst):
+        self.data[dst] = self.data.pop(src)
+    
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+    
+    def expire(self, key, seconds):
+        pass
+    
+    def scan_iter(self, match):
+        prefix = match.rstrip('*')
+        return [key.encode() for key in self.data if key.startswith(prefix)]
+
+
+class FakePipeline:
+    def __init__(self, conn):
+        self.conn = conn
+        self.calls = []
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+    
+    def execute(self):
+        return [getattr(self.conn, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class LeaderboardTestCase(APITestCase):
+    """A subject with one quiz, two students and a fake Redis."""
+    
+    def setUp(self):
+        self.redis = FakeSortedSets()
+        patcher = patch('leaderboards.boards.get_redis_connection', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        User = get_user_model()
+        self.alice = User.objects.create_user(email='alice@example.com', password='pass', full_name='Alice')
+        self.bob = User.objects.create_user(email='bob@example.com', password='pass')
+        self.subject = Subject.objects.create(title='Python', description='Learn Python', slug='python')
+        topic = Topic.objects.create(subject=self.subject, title='Basics')
+        self.lesson = Lesson.objects.create(topic=topic, title='Variables', content_html='<p>x</p>', estimated_time=5)
+        self.quiz = Quiz.objects.create(lesson=self.lesson, title='Variables quiz')
+        self.answers = []
+        for i in range(2):
+            question = Question.objects.create(quiz=self.quiz, text=f'Question {i}')
+            right = Answer.objects.create(question=question, text='Right', is_correct=True)
+            wrong = Answer.objects.create(question=question, text='Wrong')
+            self.answers.append((question.pk, right.pk, wrong.pk))
+    
+    def submit(self, user, correct):
+        """Submits with the first `correct` questions answered right."""
+        answers = {q: (right if i < correct else wrong) for i, (q, right, wrong) in enumerate(self.answers)}
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/quizzes/submit/{self.quiz.pk}/', {'answers': answers}, format='json')
+    
+    def set_status(self, user, value):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/progress/update/{self.lesson.pk}/', {'status': value}, format='json')
+    
+    def points(self, key, user):
+        return self.redis.data.get(key, {}).get(str(user.pk), 0)
+
+
+class LeaderboardUpdateTests(LeaderboardTestCase):
+    """Tests for points awarded on quiz submit and lesson completion."""
+    
+    def test_retakes_only_score_improvements(self):
+        """Test that a quiz is worth at most its best score."""
+        for correct, expected in [(1, 50), (2, 100), (1, 100)]:
+            self.submit(self.alice, correct)
+            self.assertEqual(self.points(GLOBAL_KEY, self.alice), expected)
+        self.assertEqual(self.points(subject_key(self.subject.pk), self.alice), 100)
+        self.assertEqual(self.points(weekly_key(), self.alice), 100)
+    
+    def test_completion_scores_and_reopening_takes_back(self):
+        """Test that completing a lesson is worth 10 points once."""
+        self.set_status(self.bob, 'completed')
+        self.set_status(self.bob, 'completed')
+        self.assertEqual(self.points(subject_key(self.subject.pk), self.bob), 10)
+        
+        self.set_status(self.bob, 'in_progress')
+        self.assertEqual(self.points(GLOBAL_KEY, self.bob), 0)
+
+
+class LeaderboardReadTests(LeaderboardTestCase):
+    """Tests for the top and around-me endpoints."""
+    
+    def setUp(self):
+        super().setUp()
+        self.submit(self.alice, 2)
+        self.submit(self.bob, 1)
+    
+    def test_top_entries_with_names(self):
+        """Test that the board is ranked best first with display names."""
+        response = self.client.get('/leaderboards/global/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(entry['rank'], entry['name'], entry['points']) for entry in response.data['results']],
+            [(1, 'Alice', 100), (2, 'Anonymous', 50)],
+        )
+    
+    def test_board_requires_authentication(self):
+        """Test that anonymous callers cannot read user ids off the board."""
+        self.client.force_authenticate(None)
+        response = self.client.get('/leaderboards/global/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_around_me_window(self):
+        """Test that the user's rank comes with neighbours on both sides."""
+        self.client.force_authenticate(self.bob)
+        response = self.client.get(f'/leaderboards/subjects/{self.subject.pk}/me/', {'window': 1})
+        
+        self.assertEqual((response.data['rank'], response.data['points']), (2, 50))
+        self.assertEqual([entry['rank'] for entry in response.data['results']], [1, 2])
+    
+    def test_unranked_user(self):
+        """Test that a user without points gets no rank."""
+        carol = get_user_model().objects.create_user(email='carol@example.com', password='pass')
+        self.client.force_authenticate(carol)
+        
+        response = self.client.get('/leaderboards/weekly/me/')
+        self.assertIsNone(response.data['rank'])
+    
+    def test_user_dropped_between_reads(self):
+        """Test that a rank whose entry vanished before the range read is reported as unranked."""
+        carol = get_user_model().objects.create_user(email='carol@example.com', password='pass')
+        self.client.force_authenticate(carol)
+        
+        with patch.object(self.redis, 'zrevrank', return_value=0):
+            response = self.client.get('/leaderboards/global/me/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['rank'])
+    
+    def test_unavailable_without_redis(self):
+        """Test that reads fail with a 503 when Redis is unavailable."""
+        with patch('leaderboards.boards.get_redis_connection', side_effect=NotImplementedError):
+            response = self.client.get('/leaderboards/global/')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class LeaderboardRebuildTests(LeaderboardTestCase):
+    """Tests for rebuilding the boards from the database."""
+    
+    def test_rebuild_matches_incremental_boards(self):
+        """Test that a rebuild reproduces the boards kept on the fly."""
+        self.submit(self.alice, 1)
+        self.submit(self.alice, 2)
+        self.submit(self.bob, 1)
+        self.set_status(self.bob, 'completed')
+        incremental = {key: dict(board) for key, board in self.redis.data.items()}
+        
+        self.redis.data = {subject_key(999): {'stale': 1}}
+        rebuild()
+        self.assertEqual(self.redis.data, incremental)
+    
+    def test_weekly_board_only_counts_this_weeks_improvement(self):
+        """Test that earlier weeks' best scores are not counted again this week."""
+        self.submit(self.alice, 1)
+        QuizAttempt.objects.update(attempted_at=timezone.now() - timedelta(days=14))
+        self.submit(self.alice, 2)
+        LessonProgress.objects.all().delete()
+        
+        rebuild()
+        self.assertEqual(self.points(weekly_key(), self.alice), 50)
+        self.assertEqual(self.points(GLOBAL_KEY, self.alice), 100)
+    
+    def test_viewing_an_old_completion_earns_no_weekly_points(self):
+        """Test that weekly completions go by completed_at, not by the last view."""
+        self.set_status(self.bob, 'completed')
+        LessonProgress.objects.update(completed_at=timezone.now() - timedelta(days=14))
+        QuizAttempt.objects.all().delete()
+        self.set_status(self.bob, 'completed')
+        LessonProgress.objects.update(last_accessed=timezone.now())
+        
+        rebuild()
+        self.assertEqual(self.points(weekly_key(), self.bob), 0)
+        self.assertEqual(self.points(GLOBAL_KEY, self.bob), 10)
+    
+    def test_rebuild_clears_an_emptied_weekly_board(self):
+        """Test that this week's board is removed when nothing scores this week any more."""
+        self.submit(self.alice, 1)
+        QuizAttempt.objects.update(attempted_at=timezone.now() - timedelta(days=14))
+        
+        rebuild()
+        self.assertNotIn(weekly_key(), self.redis.data)
+        self.assertEqual(self.points(GLOBAL_KEY, self.alice), 50)
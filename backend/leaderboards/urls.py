@@ -0,0 +1,11 @@
+from django.urls import path
+from .views import LeaderboardView, LeaderboardAroundMeView
+
+urlpatterns = [
+    path('global/', LeaderboardView.as_view(), {'board': 'global'}, name='leaderboard-global'),
+    path('global/me/', LeaderboardAroundMeView.as_view(), {'board': 'global'}, name='leaderboard-global-me'),
+    path('weekly/', LeaderboardView.as_view(), {'board': 'weekly'}, name='leaderboard-weekly'),
+    path('weekly/me/', LeaderboardAroundMeView.as_view(), {'board': 'weekly'}, name='leaderboard-weekly-me'),
+    path('subjects/<int:subject_id>/', LeaderboardView.as_view(), {'board': 'subject'}, name='leaderboard-subject'),
+    path('subjects/<int:subject_id>/me/', LeaderboardAroundMeView.as_view(), {'board': 'subject'}, name='leaderboard-subject-me'),
+]
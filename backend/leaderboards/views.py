@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from redis.exceptions import RedisError
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .boards import GLOBAL_KEY, subject_key, weekly_key, top, around
+
+MAX_LIMIT = 100
+MAX_WINDOW = 25
+
+
+def board_key(board, subject_id=None):
+    if board == 'subject':
+        return subject_key(subject_id)
+    if board == 'weekly':
+        return weekly_key()
+    return GLOBAL_KEY
+
+
+def int_param(request, name, default, maximum):
+    try:
+        return max(1, min(int(request.query_params.get(name, default)), maximum))
+    except ValueError:
+        return default
+
+
+ANONYMOUS_NAME = 'Anonymous'
+
+
+def with_names(entries):
+    """
+    Adds display names with one query for the whole page. Only the name a
+    user chose is shown; nothing is derived from their email address.
+    """
+    users = get_user_model().objects.filter(pk__in=[entry['user'] for entry in entries], full_name__gt='')
+    names = {str(pk): full_name for pk, full_name in users.values_list('pk', 'full_name')}
+    for entry in entries:
+        entry['name'] = names.get(entry['user'], ANONYMOUS_NAME)
+    return entries
+
+
+def unavailable():
+    return Response({'error': 'Leaderboards are temporarily unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class LeaderboardView(APIView):
+    """
+    Top entries of a board (?limit=, default 10).
+    Served straight from the Redis sorted set; see boards.py.
+    Entries carry user ids, so the board is for signed-in users only.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, board, subject_id=None):
+        try:
+            entries = top(board_key(board, subject_id), int_param(request, 'limit', 10, MAX_LIMIT))
+        except (NotImplementedError, RedisError):
+            return unavailable()
+        return Response({'results': with_names(entries)})
+
+
+class LeaderboardAroundMeView(APIView):
+    """The user's rank on a board with ?window= neighbours above and below (default 5)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, board, subject_id=None):
+        try:
+            entries = around(board_key(board, subject_id), request.user.pk, int_param(request, 'window', 5, MAX_WINDOW))
+        except (NotImplementedError, RedisError):
+            return unavailable()
+        # Unranked, or dropped by a concurrent rebuild between the rank and range reads.
+        me = next((entry for entry in entries or () if entry['user'] == str(request.user.pk)), None)
+        if me is None:
+            return Response({'rank': None, 'points': 0, 'results': []})
+        return Response({'rank': me['rank'], 'points': me['points'], 'results': with_names(entries)})
@@ -0,0 +1,101 @@
+"""
+Write-behind tracking of lesson access ("student opened lesson").
+
+Touches are recorded with one HSET into a Redis hash keyed by
+"user_id:lesson_id", so repeated touches of the same lesson coalesce into
+a single pending timestamp. `flush_access` (run periodically through the
+`flush_lesson_access` command; the `scheduler` service in
+docker-compose.yml runs it every minute) moves the hash aside and writes
+every pending timestamp to LessonProgress.last_accessed in bulk.
+
+Status changes are not deferred: they write last_accessed themselves.
+Without Redis, touches are written through immediately.
+"""
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError, ResponseError
+
+from courses.models import Lesson
+from .models import LessonProgress
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'progress:access:pending'
+FLUSHING_KEY = 'progress:access:flushing'
+FLUSH_BATCH_SIZE = 1000
+
+
+def record_access(user_id, lesson_id):
+    """Notes that the user opened the lesson; persisted by the next flush."""
+    now = time.time()
+    try:
+        get_redis_connection('default').hset(PENDING_KEY, f'{user_id}:{lesson_id}', repr(now))
+    except (NotImplementedError, RedisError) as e:
+        logger.debug(f"Access buffer unavailable, writing through: {e}")
+        LessonProgress.objects.filter(user_id=user_id, lesson_id=lesson_id).update(
+            last_accessed=datetime.fromtimestamp(now, dt_timezone.utc)
+        )
+
+
+def flush_access():
+    """
+    Writes pending access timestamps to the database; returns how many
+    (user, lesson) rows were written. A batch left behind by a crashed
+    flush is retried before new touches are picked up.
+    """
+    conn = get_redis_connection('default')
+    if not conn.exists(FLUSHING_KEY):
+        try:
+            # Atomic hand-off: touches arriving from now on go to a fresh hash.
+            conn.rename(PENDING_KEY, FLUSHING_KEY)
+        except ResponseError:
+            return 0  # nothing pending
+
+    user_pk = get_user_model()._meta.pk
+    pending = {}
+    for field, value in conn.hgetall(FLUSHING_KEY).items():
+        user_id, lesson_id = field.decode().split(':')
+        pending[(user_pk.to_python(user_id), int(lesson_id))] = datetime.fromtimestamp(float(value), dt_timezone.utc)
+
+    written = write_access(pending)
+    conn.delete(FLUSHING_KEY)
+    return written
+
+
+def write_access(pending):
+    """
+    Upserts {(user_id, lesson_id): last_accessed}, skipping users or lessons
+    deleted since the touch. An existing row only moves forward: a buffered
+    touch flushed after a newer status write leaves that newer time alone.
+    """
+    if not pending:
+        return 0
+    lessons = set(Lesson.objects.filter(pk__in={lesson_id for _, lesson_id in pending}).values_list('pk', flat=True))
+    users = set(get_user_model().objects.filter(pk__in={user_id for user_id, _ in pending}).values_list('pk', flat=True))
+    opts = LessonProgress._meta
+    fields = [opts.get_field(name) for name in ('user', 'lesson', 'status', 'last_accessed')]
+    rows = [
+        [field.get_db_prep_value(value, connection) for field, value in zip(fields, (user_id, lesson_id, 'not_started', accessed))]
+        for (user_id, lesson_id), accessed in sorted(pending.items(), key=lambda item: (str(item[0][0]), item[0][1]))
+        if lesson_id in lessons and user_id in users
+    ]
+
+    qn = connection.ops.quote_name
+    table = qn(opts.db_table)
+    user_col, lesson_col, status_col, accessed_col = (qn(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+            batch = rows[start:start + FLUSH_BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {table} ({user_col}, {lesson_col}, {status_col}, {accessed_col}) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(batch))} '
+                f'ON CONFLICT ({user_col}, {lesson_col}) DO UPDATE SET {accessed_col} = EXCLUDED.{accessed_col} '
+                f'WHERE {table}.{accessed_col} < EXCLUDED.{accessed_col}',
+                [value for row in batch for value in row],
+            )
+    return len(rows)
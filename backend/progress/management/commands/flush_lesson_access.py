@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from progress.access import flush_access
+
+
+class Command(BaseCommand):
+    help = "Writes buffered lesson access timestamps from Redis to LessonProgress. Run periodically (e.g. every minute)."
+
+    def handle(self, *args, **options):
+        written = flush_access()
+        self.stdout.write(self.style.SUCCESS(f"Flushed access for {written} lesson progress row(s)"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Subject
+from progress.services import recount_subjects
+
+
+class Command(BaseCommand):
+    help = "Recomputes the SubjectProgress counters of every subject (or the given slugs) from LessonProgress rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help="Only recount these subjects")
+
+    def handle(self, *args, **options):
+        subjects = Subject.objects.all()
+        if options['slugs']:
+            subjects = subjects.filter(slug__in=options['slugs'])
+        subject_ids = list(subjects.values_list('pk', flat=True))
+
+        recount_subjects(subject_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Recounted completion for {len(subject_ids)} subject(s)"))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_lessonsnapshot'),
+        ('progress', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lessonprogress',
+            index=models.Index(fields=['user', '-last_accessed', '-id'], name='progress_user_recent_idx'),
+        ),
+    ]
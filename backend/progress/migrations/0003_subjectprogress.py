@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_subject_progress(apps, schema_editor):
+    # Counters for enrollments that predate SubjectProgress.
+    Enrollment = apps.get_model('progress', 'Enrollment')
+    LessonProgress = apps.get_model('progress', 'LessonProgress')
+    SubjectProgress = apps.get_model('progress', 'SubjectProgress')
+    Lesson = apps.get_model('courses', 'Lesson')
+
+    totals = dict(
+        Lesson.objects.values('topic__subject_id').annotate(n=Count('id')).values_list('topic__subject_id', 'n')
+    )
+    completed = {
+        (user_id, subject_id): n
+        for user_id, subject_id, n in LessonProgress.objects.filter(status='completed')
+        .values('user_id', 'lesson__topic__subject_id')
+        .annotate(n=Count('id'))
+        .values_list('user_id', 'lesson__topic__subject_id', 'n')
+    }
+    SubjectProgress.objects.bulk_create(
+        [
+            SubjectProgress(
+                enrollment_id=pk,
+                completed_count=completed.get((user_id, subject_id), 0),
+                total_lessons=totals.get(subject_id, 0),
+            )
+            for pk, user_id, subject_id in Enrollment.objects.values_list('pk', 'user_id', 'subject_id').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0002_lessonprogress_recent_index'),
+        ('courses', '0004_lessonsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectProgress',
+            fields=[
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='completion', serialize=False, to='progress.enrollment')),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('total_lessons', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_subject_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:43
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    """Completion times were never stored; the last write to a completed row is the closest thing."""
+    LessonProgress = apps.get_model('progress', 'LessonProgress')
+    LessonProgress.objects.filter(status='completed').update(completed_at=F('last_accessed'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0004_last_accessed_write_behind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonprogress',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from courses.models import Subject, Lesson
 
 class Enrollment(models.Model):
@@ -31,11 +32,39 @@ class LessonProgress(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='lesson_progress', on_delete=models.CASCADE)
     lesson = models.ForeignKey(Lesson, related_name='user_progress', on_delete=models.CASCADE)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='not_started')
-    last_accessed = models.DateTimeField(auto_now=True)
-
+    # Set explicitly by status writes; plain touches are buffered in Redis
+    # and flushed in bulk (access.py), so this is not auto_now.
+    last_accessed = models.DateTimeField(default=timezone.now)
+    # When the lesson was last completed (None unless completed); unlike
+    # last_accessed, viewing a completed lesson again leaves it alone.
+    completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ('user', 'lesson')
+        indexes = [
+            # Keyset pagination of a user's progress, most recent first.
+            models.Index(fields=['user', '-last_accessed', '-id'], name='progress_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.lesson.title} - {self.status}"
+
+class SubjectProgress(models.Model):
+    """
+    Completion counters for one Enrollment, so dashboards read a course's
+    completion percentage without counting across the lesson tree.
+    Kept in step by services.py (status transitions) and signals.py
+    (enrollments created, lessons added, moved or removed).
+    """
+    enrollment = models.OneToOneField(Enrollment, primary_key=True, related_name='completion', on_delete=models.CASCADE)
+    completed_count = models.PositiveIntegerField(default=0)
+    total_lessons = models.PositiveIntegerField(default=0)
+
+    @property
+    def percent_complete(self):
+        if not self.total_lessons:
+            return 0.0
+        return round(100 * self.completed_count / self.total_lessons, 1)
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.completed_count}/{self.total_lessons}"
@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ProgressCursorPagination(CursorPagination):
+    """
+    Most recently accessed lessons first.
+    Backed by the (user, -last_accessed, -id) index on LessonProgress, so
+    every page is an index range scan no matter how many rows a user has.
+    """
+    ordering = ('-last_accessed', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
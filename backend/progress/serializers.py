@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Enrollment, LessonProgress
+from .models import Enrollment, LessonProgress, SubjectProgress
 
 class EnrollmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,4 +11,22 @@ class LessonProgressSerializer(serializers.ModelSerializer):
     class Meta:
         model = LessonProgress
         fields = '__all__'
-        read_only_fields = ('user', 'last_accessed')
+        read_only_fields = ('user', 'last_accessed', 'completed_at')
+
+class SubjectProgressSerializer(serializers.ModelSerializer):
+    subject = serializers.IntegerField(source='enrollment.subject_id', read_only=True)
+    percent_complete = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SubjectProgress
+        fields = ('subject', 'completed_count', 'total_lessons', 'percent_complete')
+
+class BulkProgressItemSerializer(serializers.Serializer):
+    lesson_id = serializers.IntegerField(min_value=1)
+    status = serializers.ChoiceField(choices=LessonProgress.STATUS_CHOICES)
+
+class BulkProgressSerializer(serializers.Serializer):
+    """A batch of (lesson_id, status) pairs; the last entry for a lesson wins."""
+    MAX_ITEMS = 200
+
+    items = BulkProgressItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
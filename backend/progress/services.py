@@ -0,0 +1,96 @@
+"""
+Maintenance of the SubjectProgress counters.
+
+Status writes call `record_transitions` inside the same transaction as
+the LessonProgress write, so the counters can never drift from a
+committed status. Structural changes (lessons added, moved or deleted)
+go through `recount_subjects`.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+
+from courses.models import Lesson
+from leaderboards.boards import COMPLETION_POINTS, award_on_commit
+from .models import LessonProgress, SubjectProgress
+
+COMPLETED = 'completed'
+
+
+def completion_time(old_status, new_status, completed_at, now):
+    """completed_at after a status write: set on completing, kept while completed, cleared on reopening."""
+    if new_status != COMPLETED:
+        return None
+    return completed_at if old_status == COMPLETED and completed_at else now
+
+
+def lock_progress(user):
+    """
+    Serializes status writes of one user (call inside the transaction).
+    Row locks on LessonProgress cannot cover rows that do not exist yet,
+    so two syncs inserting the same new lesson would both see no previous
+    status and count the completion twice; the user row lock prevents it.
+    """
+    list(get_user_model().objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+
+
+def record_transitions(user, transitions):
+    """
+    Applies (subject_id, old_status, new_status) transitions of `user`'s
+    lessons to their SubjectProgress rows: one UPDATE per subject whose
+    completed count actually changes. Completions also score on the
+    leaderboards once the transaction commits.
+    """
+    deltas = Counter()
+    for subject_id, old_status, new_status in transitions:
+        deltas[subject_id] += (new_status == COMPLETED) - (old_status == COMPLETED)
+    for subject_id, delta in deltas.items():
+        if delta:
+            SubjectProgress.objects.filter(enrollment__user=user, enrollment__subject_id=subject_id).update(
+                completed_count=F('completed_count') + delta
+            )
+    award_on_commit(user.pk, {subject_id: delta * COMPLETION_POINTS for subject_id, delta in deltas.items()})
+
+
+def count_completed(user_ids, subject_id):
+    """{user_id: completed lessons in the subject} for the given users."""
+    rows = (
+        LessonProgress.objects.filter(user_id__in=user_ids, lesson__topic__subject_id=subject_id, status=COMPLETED)
+        .values('user_id')
+        .annotate(completed=Count('id'))
+        .values_list('user_id', 'completed')
+    )
+    return dict(rows)
+
+
+def create_subject_progress(enrollment):
+    """Counts the starting point for a new enrollment (lessons may be completed before enrolling)."""
+    completed = count_completed([enrollment.user_id], enrollment.subject_id).get(enrollment.user_id, 0)
+    return SubjectProgress.objects.create(
+        enrollment=enrollment,
+        completed_count=completed,
+        total_lessons=Lesson.objects.filter(topic__subject_id=enrollment.subject_id).count(),
+    )
+
+
+def recount_subjects(subject_ids, completed=True):
+    """
+    Recomputes total_lessons (and, unless `completed` is False, the
+    completed counts) for every enrollment in the given subjects.
+    """
+    for subject_id in subject_ids:
+        rows = SubjectProgress.objects.filter(enrollment__subject_id=subject_id)
+        total = Lesson.objects.filter(topic__subject_id=subject_id).count()
+        if not completed:
+            rows.update(total_lessons=total)
+            continue
+        users = dict(rows.values_list('pk', 'enrollment__user_id'))
+        counts = count_completed(users.values(), subject_id)
+        SubjectProgress.objects.bulk_update(
+            [
+                SubjectProgress(enrollment_id=pk, total_lessons=total, completed_count=counts.get(user_id, 0))
+                for pk, user_id in users.items()
+            ],
+            ['total_lessons', 'completed_count'],
+        )
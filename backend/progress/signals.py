@@ -0,0 +1,63 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+
+from courses.models import Topic, Lesson
+from .models import Enrollment
+from .services import create_subject_progress, recount_subjects
+
+
+def create_completion(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        create_subject_progress(instance)
+
+
+def lesson_subject_id(lesson_id):
+    return Lesson.objects.filter(pk=lesson_id).values_list('topic__subject_id', flat=True).first()
+
+
+def topic_subject_id(topic_id):
+    return Topic.objects.filter(pk=topic_id).values_list('subject_id', flat=True).first()
+
+
+def remember_lesson_subject(sender, instance, raw=False, **kwargs):
+    """Keeps the stored subject, so a lesson moving between subjects updates both."""
+    if not raw and instance.pk is not None:
+        instance._previous_subject_id = lesson_subject_id(instance.pk)
+
+
+def recount_on_lesson_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = topic_subject_id(instance.topic_id)
+    previous = getattr(instance, '_previous_subject_id', None)
+    if created:
+        # Nobody can have completed a brand new lesson: only the total moves.
+        recount_subjects([current], completed=False)
+    elif previous != current:
+        recount_subjects({current, previous} - {None})
+
+
+def recount_on_lesson_delete(sender, instance, **kwargs):
+    # Progress rows were cascade-deleted with the lesson, so recount both counters.
+    subject_id = getattr(instance, '_previous_subject_id', None)
+    if subject_id is not None:
+        recount_subjects([subject_id])
+
+
+def remember_topic_subject(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None:
+        instance._previous_subject_id = topic_subject_id(instance.pk)
+
+
+def recount_on_topic_save(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_subject_id', None)
+    if not raw and not created and previous is not None and previous != instance.subject_id:
+        recount_subjects([previous, instance.subject_id])
+
+
+post_save.connect(create_completion, sender=Enrollment)
+pre_save.connect(remember_lesson_subject, sender=Lesson)
+post_save.connect(recount_on_lesson_save, sender=Lesson)
+pre_delete.connect(remember_lesson_subject, sender=Lesson)
+post_delete.connect(recount_on_lesson_delete, sender=Lesson)
+pre_save.connect(remember_topic_subject, sender=Topic)
+post_save.connect(recount_on_topic_save, sender=Topic)
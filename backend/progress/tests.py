@@ -1,3 +1,271 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from redis.exceptions import ResponseError
+
+from courses.models import Subject, Topic, Lesson
+from .models import Enrollment, LessonProgress, SubjectProgress
+from .access import flush_access
+
+
+class ProgressApiTestCase(APITestCase):
+    """Builds a subject with a few lessons and an authenticated student."""
+    
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='student@example.com', password='pass')
+        self.client.force_authenticate(self.user)
+        self.subject = Subject.objects.create(title='Python', description='Learn Python', slug='python')
+        topic = Topic.objects.create(subject=self.subject, title='Basics')
+        self.lessons = [
+            Lesson.objects.create(topic=topic, title=f'Lesson {i}', content_html='<p>x</p>', estimated_time=5)
+            for i in range(5)
+        ]
+
+
+class UserProgressPaginationTests(ProgressApiTestCase):
+    """Tests for cursor pagination of /progress/my-progress/."""
+    
+    def test_most_recent_first_across_pages(self):
+        """Test that pages follow last_accessed descending without overlap."""
+        now = timezone.now()
+        for i, lesson in enumerate(self.lessons):
+            progress = LessonProgress.objects.create(user=self.user, lesson=lesson)
+            LessonProgress.objects.filter(pk=progress.pk).update(last_accessed=now - timedelta(minutes=i))
+        
+        first = self.client.get('/progress/my-progress/', {'page_size': 3})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        second = self.client.get(first.data['next'])
+        
+        seen = [row['lesson'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(seen, [lesson.pk for lesson in self.lessons])
+        self.assertIsNone(second.data['next'])
+
+
+class BulkProgressTests(ProgressApiTestCase):
+    """Tests for /progress/bulk/."""
+    
+    def test_bulk_upsert_in_constant_queries(self):
+        """Test that a batch creates and updates rows with one validation query and one write."""
+        LessonProgress.objects.create(user=self.user, lesson=self.lessons[0], status='in_progress')
+        items = [{'lesson_id': lesson.pk, 'status': 'completed'} for lesson in self.lessons]
+        
+        # validate, savepoint, lock user, lock previous rows, upsert, counter update, release
+        with self.assertNumQueries(7):
+            response = self.client.post('/progress/bulk/', {'items': items}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+        statuses = set(LessonProgress.objects.filter(user=self.user).values_list('status', flat=True))
+        self.assertEqual(statuses, {'completed'})
+        self.assertEqual(LessonProgress.objects.count(), 5)
+    
+    def test_last_entry_for_a_lesson_wins(self):
+        """Test that duplicate lesson ids collapse to the last status."""
+        lesson_id = self.lessons[0].pk
+        items = [{'lesson_id': lesson_id, 'status': 'completed'}, {'lesson_id': lesson_id, 'status': 'in_progress'}]
+        
+        self.client.post('/progress/bulk/', {'items': items}, format='json')
+        self.assertEqual(LessonProgress.objects.get(user=self.user).status, 'in_progress')
+    
+    def test_unknown_lessons_reject_the_batch(self):
+        """Test that nothing is written when a lesson id does not exist."""
+        items = [{'lesson_id': self.lessons[0].pk, 'status': 'completed'}, {'lesson_id': 999999, 'status': 'completed'}]
+        
+        response = self.client.post('/progress/bulk/', {'items': items}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['lesson_ids'], [999999])
+        self.assertFalse(LessonProgress.objects.exists())
+    
+    def test_invalid_status_and_oversized_batches(self):
+        """Test that bad statuses and batches over the cap are rejected."""
+        bad_status = [{'lesson_id': self.lessons[0].pk, 'status': 'done'}]
+        self.assertEqual(self.client.post('/progress/bulk/', {'items': bad_status}, format='json').status_code, 400)
+        
+        too_many = [{'lesson_id': self.lessons[0].pk, 'status': 'completed'}] * 201
+        self.assertEqual(self.client.post('/progress/bulk/', {'items': too_many}, format='json').status_code, 400)
+
+
+class SubjectProgressTests(ProgressApiTestCase):
+    """Tests for the maintained per-subject completion counters."""
+    
+    def setUp(self):
+        super().setUp()
+        self.client.post(f'/progress/enroll/{self.subject.pk}/')
+    
+    def completion(self):
+        return SubjectProgress.objects.get(enrollment__user=self.user, enrollment__subject=self.subject)
+    
+    def test_enrolling_counts_existing_progress(self):
+        """Test that lessons completed before enrolling are counted."""
+        other = get_user_model().objects.create_user(email='other@example.com', password='pass')
+        LessonProgress.objects.create(user=other, lesson=self.lessons[0], status='completed')
+        
+        enrollment = Enrollment.objects.create(user=other, subject=self.subject)
+        self.assertEqual(enrollment.completion.completed_count, 1)
+        self.assertEqual(enrollment.completion.total_lessons, 5)
+    
+    def test_transitions_move_the_counter(self):
+        """Test that only completed <-> not completed transitions change the count."""
+        lesson_id = self.lessons[0].pk
+        for new_status, expected in [('in_progress', 0), ('completed', 1), ('completed', 1), ('in_progress', 0)]:
+            self.client.post(f'/progress/update/{lesson_id}/', {'status': new_status}, format='json')
+            self.assertEqual(self.completion().completed_count, expected)
+    
+    def test_completed_at_only_changes_on_completion(self):
+        """Test that completed_at is set on completing, kept by repeats and views, and cleared on reopening."""
+        lesson = self.lessons[0]
+        self.client.post('/progress/bulk/', {'items': [{'lesson_id': lesson.pk, 'status': 'completed'}]}, format='json')
+        first = LessonProgress.objects.get(lesson=lesson).completed_at
+        self.assertIsNotNone(first)
+        
+        self.client.post(f'/progress/update/{lesson.pk}/', {'status': 'completed'}, format='json')
+        self.client.post('/progress/bulk/', {'items': [{'lesson_id': lesson.pk, 'status': 'completed'}]}, format='json')
+        self.assertEqual(LessonProgress.objects.get(lesson=lesson).completed_at, first)
+        
+        self.client.post(f'/progress/update/{lesson.pk}/', {'status': 'in_progress'}, format='json')
+        self.assertIsNone(LessonProgress.objects.get(lesson=lesson).completed_at)
+    
+    def test_bulk_sync_moves_the_counter(self):
+        """Test that bulk updates apply their transitions."""
+        items = [{'lesson_id': lesson.pk, 'status': 'completed'} for lesson in self.lessons[:3]]
+        self.client.post('/progress/bulk/', {'items': items}, format='json')
+        items = [{'lesson_id': self.lessons[0].pk, 'status': 'in_progress'}, {'lesson_id': self.lessons[3].pk, 'status': 'completed'}]
+        self.client.post('/progress/bulk/', {'items': items}, format='json')
+        
+        self.assertEqual(self.completion().completed_count, 3)
+    
+    def test_lesson_changes_fix_up_counters(self):
+        """Test that adding and deleting lessons keeps both counters right."""
+        self.client.post(f'/progress/update/{self.lessons[0].pk}/', {'status': 'completed'}, format='json')
+        Lesson.objects.create(topic=self.lessons[0].topic, title='New', content_html='<p>x</p>', estimated_time=5)
+        self.assertEqual(self.completion().total_lessons, 6)
+        
+        self.lessons[0].delete()
+        completion = self.completion()
+        self.assertEqual((completion.completed_count, completion.total_lessons), (0, 5))
+    
+    def test_moving_a_topic_recounts_both_subjects(self):
+        """Test that lessons moving to another subject leave this one's counters."""
+        self.client.post(f'/progress/update/{self.lessons[0].pk}/', {'status': 'completed'}, format='json')
+        topic = self.lessons[0].topic
+        topic.subject = Subject.objects.create(title='Go', description='Learn Go', slug='go')
+        topic.save()
+        
+        completion = self.completion()
+        self.assertEqual((completion.completed_count, completion.total_lessons), (0, 0))
+    
+    def test_dashboard_reads_counters(self):
+        """Test that /progress/my-subjects/ reports percentages in one query."""
+        self.client.post(f'/progress/update/{self.lessons[0].pk}/', {'status': 'completed'}, format='json')
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/progress/my-subjects/')
+        self.assertEqual(response.data, [
+            {'subject': self.subject.pk, 'completed_count': 1, 'total_lessons': 5, 'percent_complete': 20.0}
+        ])
+
+
+class FakeRedisHashes:
+    """The handful of hash commands access.py uses, kept in a dict."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[field.encode()] = value.encode()
+    
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+    
+    def exists(self, key):
+        return int(key in self.data)
+    
+    def rename(self, src, dst):
+        if src not in self.data:
+            raise ResponseError('no such key')
+        self.data[dst] = self.data.pop(src)
+    
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class LessonAccessTests(ProgressApiTestCase):
+    """Tests for write-behind access tracking."""
+    
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedisHashes()
+        patcher = patch('progress.access.get_redis_connection', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.lesson = self.lessons[0]
+    
+    def touch(self, lesson=None):
+        return self.client.post(f'/progress/update/{(lesson or self.lesson).pk}/', {}, format='json')
+    
+    def test_repeated_touches_do_not_update_rows(self):
+        """Test that touches after the first only reach Redis."""
+        self.touch()
+        stored = LessonProgress.objects.get().last_accessed
+        
+        with self.assertNumQueries(2):  # lesson, progress lookup
+            self.touch()
+        self.touch()
+        self.assertEqual(LessonProgress.objects.get().last_accessed, stored)
+        self.assertEqual(len(self.redis.hgetall('progress:access:pending')), 1)
+    
+    def test_flush_writes_latest_touch(self):
+        """Test that the flush persists coalesced timestamps in bulk."""
+        for lesson in self.lessons[:3]:
+            self.touch(lesson)
+        LessonProgress.objects.update(last_accessed=timezone.now() - timedelta(days=1))
+        for lesson in self.lessons[:3]:
+            self.touch(lesson)
+        
+        self.assertEqual(flush_access(), 3)
+        recent = LessonProgress.objects.filter(last_accessed__gt=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(recent.count(), 3)
+        self.assertEqual(self.redis.data, {})
+        self.assertEqual(flush_access(), 0)
+    
+    def test_flush_skips_deleted_lessons(self):
+        """Test that touches of lessons deleted before the flush are dropped."""
+        self.redis.hset('progress:access:pending', f'{self.user.pk}:999999', '1700000000.0')
+        self.redis.hset('progress:access:pending', f'{self.user.pk}:{self.lesson.pk}', '1700000000.0')
+        
+        call_command('flush_lesson_access', stdout=io.StringIO())
+        self.assertEqual(LessonProgress.objects.get().last_accessed.timestamp(), 1700000000.0)
+    
+    def test_flush_never_moves_last_accessed_backwards(self):
+        """Test that a stale buffered touch does not overwrite a newer status write."""
+        self.client.post(f'/progress/update/{self.lesson.pk}/', {'status': 'completed'}, format='json')
+        written = LessonProgress.objects.get().last_accessed
+        self.redis.hset('progress:access:pending', f'{self.user.pk}:{self.lesson.pk}', '1700000000.0')
+        
+        flush_access()
+        self.assertEqual(LessonProgress.objects.get().last_accessed, written)
+    
+    def test_status_changes_write_through(self):
+        """Test that status writes update the row and last_accessed immediately."""
+        self.touch()
+        LessonProgress.objects.update(last_accessed=timezone.now() - timedelta(days=1))
+        
+        self.client.post(f'/progress/update/{self.lesson.pk}/', {'status': 'completed'}, format='json')
+        progress = LessonProgress.objects.get()
+        self.assertEqual(progress.status, 'completed')
+        self.assertGreater(progress.last_accessed, timezone.now() - timedelta(minutes=1))
+    
+    def test_without_redis_touches_write_through(self):
+        """Test that access is written directly when Redis is unavailable."""
+        self.touch()
+        LessonProgress.objects.update(last_accessed=timezone.now() - timedelta(days=1))
+        
+        with patch('progress.access.get_redis_connection', side_effect=NotImplementedError):
+            self.touch()
+        self.assertGreater(LessonProgress.objects.get().last_accessed, timezone.now() - timedelta(minutes=1))
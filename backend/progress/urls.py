@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import EnrollmentView, UpdateProgressView, UserProgressView
+from .views import EnrollmentView, UpdateProgressView, BulkProgressView, UserProgressView, SubjectProgressView
 
 urlpatterns = [
     path('enroll/<int:subject_id>/', EnrollmentView.as_view(), name='enroll'),
     path('update/<int:lesson_id>/', UpdateProgressView.as_view(), name='update-progress'),
+    path('bulk/', BulkProgressView.as_view(), name='bulk-progress'),
     path('my-progress/', UserProgressView.as_view(), name='my-progress'),
+    path('my-subjects/', SubjectProgressView.as_view(), name='my-subjects'),
 ]
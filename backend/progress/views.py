@@ -1,8 +1,13 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import Enrollment, LessonProgress
-from .serializers import EnrollmentSerializer, LessonProgressSerializer
+from django.db import transaction
+from django.utils import timezone
+from .models import Enrollment, LessonProgress, SubjectProgress
+from .serializers import EnrollmentSerializer, LessonProgressSerializer, BulkProgressSerializer, SubjectProgressSerializer
+from .services import completion_time, lock_progress, record_transitions
+from .access import record_access
+from .pagination import ProgressCursorPagination
 from courses.models import Subject, Lesson
 from django.shortcuts import get_object_or_404
 
@@ -16,24 +21,110 @@ class EnrollmentView(APIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 class UpdateProgressView(APIView):
+    """
+    Records that the user opened a lesson, optionally with a new status.
+    
+    Performance Note:
+    - Status changes are written through immediately.
+    - Plain touches (no status) only create the row on first access; later
+      touches are coalesced in Redis and flushed in bulk (access.py).
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, lesson_id):
-        lesson = get_object_or_404(Lesson, pk=lesson_id)
-        progress, created = LessonProgress.objects.get_or_create(user=request.user, lesson=lesson)
-        
-        # Update status if provided
+        lesson = get_object_or_404(Lesson.objects.select_related('topic').only('id', 'topic__subject_id'), pk=lesson_id)
         new_status = request.data.get('status')
-        if new_status in dict(LessonProgress.STATUS_CHOICES):
+        
+        if new_status not in dict(LessonProgress.STATUS_CHOICES):
+            progress, created = LessonProgress.objects.get_or_create(user=request.user, lesson=lesson)
+            if not created:
+                record_access(request.user.pk, lesson.pk)
+                progress.last_accessed = timezone.now()
+            return Response(LessonProgressSerializer(progress).data)
+        
+        with transaction.atomic():
+            # Concurrent updates must see each other's status to count transitions once.
+            lock_progress(request.user)
+            progress, created = LessonProgress.objects.select_for_update().get_or_create(user=request.user, lesson=lesson)
+            old_status = progress.status
             progress.status = new_status
+            progress.last_accessed = timezone.now()
+            progress.completed_at = completion_time(old_status, new_status, progress.completed_at, progress.last_accessed)
             progress.save()
+            record_transitions(request.user, [(lesson.topic.subject_id, old_status, new_status)])
             
         serializer = LessonProgressSerializer(progress)
         return Response(serializer.data)
 
+class BulkProgressView(APIView):
+    """
+    Applies a batch of progress updates, e.g. an offline or mobile client
+    syncing a whole session: {"items": [{"lesson_id": 1, "status": "completed"}, ...]}.
+    
+    Performance Note:
+    - Lesson ids are validated in one query and all rows are written in one
+      INSERT ... ON CONFLICT DO UPDATE, whatever the batch size.
+    - Subject completion counters get one UPDATE per subject touched.
+    - The user row is locked first, so overlapping syncs that insert the
+      same new lessons still count each completion once.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkProgressSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        statuses = {item['lesson_id']: item['status'] for item in serializer.validated_data['items']}
+
+        subjects = dict(Lesson.objects.filter(pk__in=statuses).values_list('pk', 'topic__subject_id'))
+        missing = sorted(set(statuses) - set(subjects))
+        if missing:
+            return Response({'error': 'Unknown lessons', 'lesson_ids': missing}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            lock_progress(request.user)
+            previous = {
+                lesson_id: (old_status, completed_at)
+                for lesson_id, old_status, completed_at in LessonProgress.objects.select_for_update()
+                .filter(user=request.user, lesson_id__in=statuses)
+                .values_list('lesson_id', 'status', 'completed_at')
+            }
+            now = timezone.now()
+            rows, transitions = [], []
+            for lesson_id, value in statuses.items():
+                old_status, completed_at = previous.get(lesson_id, ('not_started', None))
+                rows.append(LessonProgress(
+                    user=request.user, lesson_id=lesson_id, status=value, last_accessed=now,
+                    completed_at=completion_time(old_status, value, completed_at, now),
+                ))
+                transitions.append((subjects[lesson_id], old_status, value))
+            LessonProgress.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['user', 'lesson'],
+                update_fields=['status', 'last_accessed', 'completed_at'],
+            )
+            record_transitions(request.user, transitions)
+        return Response({'count': len(statuses)})
+
 class UserProgressView(generics.ListAPIView):
+    """
+    The user's lesson progress, most recently accessed first.
+    Cursor-paginated so power users with thousands of rows get flat response times.
+    """
     serializer_class = LessonProgressSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ProgressCursorPagination
 
     def get_queryset(self):
         return LessonProgress.objects.filter(user=self.request.user)
+
+class SubjectProgressView(generics.ListAPIView):
+    """
+    Completion per enrolled subject for the dashboard.
+    Reads the maintained SubjectProgress counters: no counting over lessons.
+    """
+    serializer_class = SubjectProgressSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return SubjectProgress.objects.filter(enrollment__user=self.request.user).select_related('enrollment').order_by('enrollment_id')
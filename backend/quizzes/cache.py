@@ -0,0 +1,8 @@
+"""
+Cache versioning for quizzes (same scheme as courses/cache.py).
+Quizzes are addressed by lesson in the API, so the version is per lesson.
+"""
+
+
+def quiz_version_key(lesson_id):
+    return f'quizzes:lesson:{lesson_id}:version'
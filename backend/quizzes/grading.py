@@ -0,0 +1,59 @@
+"""
+Server-side quiz grading.
+
+A quiz's answer key ({question_id: {answer_id: is_correct}}) is loaded in one
+query and cached per quiz version, both in Redis and in process memory.
+Question/Answer edits bump the version (signals.py), so stale keys are
+never used. Grading a submission is then pure dictionary lookups.
+"""
+from functools import lru_cache
+
+from courses.cache import get_or_build, get_version
+from .cache import quiz_version_key
+from .models import Question
+
+
+def load_answer_key(quiz_id):
+    """{question_id: {answer_id: is_correct}} for every question, in one query."""
+    answer_key = {}
+    rows = Question.objects.filter(quiz_id=quiz_id).values_list('id', 'answers__id', 'answers__is_correct')
+    for question_id, answer_id, is_correct in rows:
+        answers = answer_key.setdefault(question_id, {})
+        if answer_id is not None:
+            answers[answer_id] = is_correct
+    return answer_key
+
+
+@lru_cache(maxsize=512)
+def _cached_answer_key(quiz_id, lesson_id, version):
+    return get_or_build(
+        f'quizzes:answer-key:{quiz_id}',
+        quiz_version_key(lesson_id),
+        lambda: load_answer_key(quiz_id),
+        version=version,
+    )
+
+
+def get_answer_key(quiz):
+    """The current answer key for `quiz`; one cache read when warm in this process."""
+    version = get_version(quiz_version_key(quiz.lesson_id))
+    return _cached_answer_key(quiz.pk, quiz.lesson_id, version)
+
+
+def grade(answer_key, answers_data):
+    """
+    Maps every question of the key to (answer_id, is_correct) for a
+    {question_id: answer_id} submission. Ids may arrive as strings (JSON
+    object keys); unanswered, unknown or malformed entries grade as
+    (None, False).
+    """
+    choices = {question_id: (None, False) for question_id in answer_key}
+    for q_id, a_id in answers_data.items():
+        try:
+            q_id, a_id = int(q_id), int(a_id)
+        except (TypeError, ValueError):
+            continue
+        answers = answer_key.get(q_id)
+        if answers is not None and a_id in answers:
+            choices[q_id] = (a_id, answers[a_id])
+    return choices
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from quizzes.models import Quiz
+from quizzes.stats import recompute_quiz_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuilds item-analysis aggregates from stored attempts for every quiz (or the given ids)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int, help="Only recompute these quizzes")
+
+    def handle(self, *args, **options):
+        quiz_ids = Quiz.objects.order_by('pk').values_list('pk', flat=True)
+        if options['quiz_ids']:
+            quiz_ids = quiz_ids.filter(pk__in=options['quiz_ids'])
+
+        total = 0
+        for quiz_id in quiz_ids:
+            total += recompute_quiz_stats(quiz_id)
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed stats for {len(quiz_ids)} quiz(zes) from {total} attempt(s)"))
@@ -32,3 +32,46 @@ class QuizAttempt(models.Model):
 
     def __str__(self):
         return f"{self.user.email} - {self.quiz.title} - {self.score}"
+
+class AttemptAnswer(models.Model):
+    """
+    One row per question of the quiz at submit time.
+    `answer` is null when the question was left unanswered.
+    """
+    attempt = models.ForeignKey(QuizAttempt, related_name='answers', on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, related_name='attempt_answers', on_delete=models.CASCADE)
+    answer = models.ForeignKey(Answer, related_name='attempt_answers', null=True, on_delete=models.SET_NULL)
+    is_correct = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('attempt', 'question')
+
+# Item-analysis aggregates, incremented on every submit (stats.py) so the
+# stats endpoint never has to scan attempts. `recompute_quiz_stats`
+# rebuilds them from AttemptAnswer rows.
+
+class QuestionStat(models.Model):
+    """
+    Running sums for one question: enough for difficulty (p-value) and
+    point-biserial discrimination without revisiting attempts.
+    """
+    question = models.OneToOneField(Question, primary_key=True, related_name='stat', on_delete=models.CASCADE)
+    attempt_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    score_sq_sum = models.FloatField(default=0)
+    correct_score_sum = models.FloatField(default=0)
+
+class AnswerStat(models.Model):
+    """How many attempts picked this answer."""
+    answer = models.OneToOneField(Answer, primary_key=True, related_name='stat', on_delete=models.CASCADE)
+    selected_count = models.PositiveIntegerField(default=0)
+
+class QuizScoreBucket(models.Model):
+    """Score histogram: bucket n counts attempts scoring in [10n, 10n + 10), with 100 in bucket 9."""
+    quiz = models.ForeignKey(Quiz, related_name='score_buckets', on_delete=models.CASCADE)
+    bucket = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('quiz', 'bucket')
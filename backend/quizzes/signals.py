@@ -0,0 +1,59 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+
+from courses.cache import bump_version
+from .models import Quiz, Question, Answer
+from .cache import quiz_version_key
+
+QUIZ_MODELS = (Quiz, Question, Answer)
+
+
+def affected_lesson_id(instance):
+    """The lesson whose quiz payload includes `instance`."""
+    try:
+        if isinstance(instance, Quiz):
+            return instance.lesson_id
+        if isinstance(instance, Question):
+            return instance.quiz.lesson_id
+        if isinstance(instance, Answer):
+            return instance.question.quiz.lesson_id
+    except ObjectDoesNotExist:
+        # Parent already gone (cascade delete); its own signal covers it.
+        pass
+    return None
+
+
+def bump_on_commit(lesson_ids):
+    keys = {quiz_version_key(lesson_id) for lesson_id in lesson_ids if lesson_id is not None}
+    if keys:
+        transaction.on_commit(lambda: [bump_version(key) for key in keys])
+
+
+def remember_previous(sender, instance, raw=False, **kwargs):
+    """Keeps the stored row's lesson, in case the quiz or question is moved."""
+    if raw or instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    instance._previous_lesson_id = affected_lesson_id(previous) if previous else None
+
+
+def invalidate_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump_on_commit({affected_lesson_id(instance), getattr(instance, '_previous_lesson_id', None)})
+
+
+def remember_deleted(sender, instance, **kwargs):
+    instance._previous_lesson_id = affected_lesson_id(instance)
+
+
+def invalidate_on_delete(sender, instance, **kwargs):
+    bump_on_commit({getattr(instance, '_previous_lesson_id', None)})
+
+
+for model in QUIZ_MODELS:
+    pre_save.connect(remember_previous, sender=model)
+    post_save.connect(invalidate_on_save, sender=model)
+    pre_delete.connect(remember_deleted, sender=model)
+    post_delete.connect(invalidate_on_delete, sender=model)
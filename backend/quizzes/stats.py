@@ -0,0 +1,194 @@
+"""
+Item analysis for quizzes.
+
+Every submit stores its per-question choices (AttemptAnswer) and bumps
+the running aggregates (QuestionStat, AnswerStat, QuizScoreBucket) with
+one INSERT ... ON CONFLICT per table, so concurrent submits never lose
+counts. `quiz_stats` then reads O(questions) rows instead of scanning
+attempts; `recompute_quiz_stats` rebuilds the aggregates for backfills.
+"""
+import math
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Prefetch
+
+from .models import Answer, AttemptAnswer, Question, QuestionStat, AnswerStat, Quiz, QuizAttempt, QuizScoreBucket
+
+BUCKET_COUNT = 10
+
+
+def score_bucket(score):
+    return min(int(score // 10), BUCKET_COUNT - 1)
+
+
+def _increment(model, key_fields, counter_fields, rows):
+    """
+    Upserts `rows`, adding the counter values onto any existing row. Rows
+    are written in key order, so concurrent submits lock shared rows in
+    the same order and cannot deadlock each other.
+    """
+    if not rows:
+        return
+    rows = sorted(rows, key=lambda row: row[:len(key_fields)])
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    keys = [qn(model._meta.get_field(name).column) for name in key_fields]
+    counters = [qn(model._meta.get_field(name).column) for name in counter_fields]
+    row_sql = '(' + ', '.join(['%s'] * (len(keys) + len(counters))) + ')'
+    updates = ', '.join(f'{col} = {table}.{col} + EXCLUDED.{col}' for col in counters)
+    sql = (
+        f'INSERT INTO {table} ({", ".join(keys + counters)}) '
+        f'VALUES {", ".join([row_sql] * len(rows))} '
+        f'ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def record_attempt(attempt, choices):
+    """
+    Stores the attempt's choices ({question_id: (answer_id, is_correct)},
+    see grading.grade) and adds it to the quiz aggregates.
+    """
+    score = attempt.score
+    AttemptAnswer.objects.bulk_create([
+        AttemptAnswer(attempt=attempt, question_id=question_id, answer_id=answer_id, is_correct=is_correct)
+        for question_id, (answer_id, is_correct) in choices.items()
+    ])
+    _increment(
+        QuestionStat,
+        ['question'],
+        ['attempt_count', 'correct_count', 'score_sum', 'score_sq_sum', 'correct_score_sum'],
+        [
+            (question_id, 1, int(is_correct), score, score * score, score if is_correct else 0)
+            for question_id, (_, is_correct) in choices.items()
+        ],
+    )
+    _increment(
+        AnswerStat,
+        ['answer'],
+        ['selected_count'],
+        [(answer_id, 1) for answer_id, _ in choices.values() if answer_id is not None],
+    )
+    _increment(QuizScoreBucket, ['quiz', 'bucket'], ['count'], [(attempt.quiz_id, score_bucket(score), 1)])
+
+
+def _discrimination(stat):
+    """Point-biserial correlation between getting the question right and the quiz score."""
+    n, correct = stat.attempt_count, stat.correct_count
+    if not 0 < correct < n:
+        return None
+    mean = stat.score_sum / n
+    variance = stat.score_sq_sum / n - mean * mean
+    if variance <= 1e-9:
+        return None
+    mean_correct = stat.correct_score_sum / correct
+    mean_wrong = (stat.score_sum - stat.correct_score_sum) / (n - correct)
+    p = correct / n
+    return (mean_correct - mean_wrong) / math.sqrt(variance) * math.sqrt(p * (1 - p))
+
+
+def quiz_stats(quiz):
+    """Difficulty, discrimination and answer distribution per question, plus the score histogram."""
+    questions = (
+        Question.objects.filter(quiz=quiz)
+        .select_related('stat')
+        .order_by('id')
+        .prefetch_related(Prefetch('answers', queryset=Answer.objects.select_related('stat').order_by('id')))
+    )
+    histogram = [0] * BUCKET_COUNT
+    for bucket, count in QuizScoreBucket.objects.filter(quiz=quiz).values_list('bucket', 'count'):
+        histogram[bucket] = count
+
+    results = []
+    for question in questions:
+        stat = getattr(question, 'stat', None) or QuestionStat(question=question)
+        results.append({
+            'id': question.id,
+            'text': question.text,
+            'attempt_count': stat.attempt_count,
+            'difficulty': stat.correct_count / stat.attempt_count if stat.attempt_count else None,
+            'discrimination': _discrimination(stat),
+            'answers': [
+                {
+                    'id': answer.id,
+                    'text': answer.text,
+                    'is_correct': answer.is_correct,
+                    'selected_count': answer.stat.selected_count if hasattr(answer, 'stat') else 0,
+                }
+                for answer in question.answers.all()
+            ],
+        })
+    return {'quiz': quiz.id, 'attempt_count': sum(histogram), 'score_histogram': histogram, 'questions': results}
+
+
+def recompute_quiz_stats(quiz_id):
+    """
+    Rebuilds a quiz's aggregates from its attempts with NumPy.
+    Attempts from before per-answer records existed only count towards
+    the score histogram.
+
+    Runs in one transaction that first locks the quiz row. A submit's
+    attempt insert takes a key-share lock on that row through its foreign
+    key, so submits in flight finish before the attempts are read, and new
+    ones wait until the rebuilt aggregates are written. Neither side's
+    increments are lost.
+    """
+    with transaction.atomic():
+        list(Quiz.objects.select_for_update().filter(pk=quiz_id).values_list('pk', flat=True))
+        return _recompute_locked(quiz_id)
+
+
+def _recompute_locked(quiz_id):
+    scores = np.fromiter(
+        QuizAttempt.objects.filter(quiz_id=quiz_id).values_list('score', flat=True), dtype=np.float64
+    )
+    rows = list(
+        AttemptAnswer.objects.filter(attempt__quiz_id=quiz_id)
+        .values_list('question_id', 'answer_id', 'is_correct', 'attempt__score')
+    )
+
+    question_stats, answer_stats = [], []
+    if rows:
+        question_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        correct = np.array([row[2] for row in rows], dtype=np.float64)
+        row_scores = np.array([row[3] for row in rows], dtype=np.float64)
+
+        questions, index = np.unique(question_ids, return_inverse=True)
+        attempts = np.bincount(index)
+        correct_counts = np.bincount(index, weights=correct)
+        score_sums = np.bincount(index, weights=row_scores)
+        score_sq_sums = np.bincount(index, weights=row_scores * row_scores)
+        correct_score_sums = np.bincount(index, weights=row_scores * correct)
+        question_stats = [
+            QuestionStat(
+                question_id=int(questions[i]),
+                attempt_count=int(attempts[i]),
+                correct_count=int(correct_counts[i]),
+                score_sum=float(score_sums[i]),
+                score_sq_sum=float(score_sq_sums[i]),
+                correct_score_sum=float(correct_score_sums[i]),
+            )
+            for i in range(len(questions))
+        ]
+
+        selected = np.array([row[1] for row in rows if row[1] is not None], dtype=np.int64)
+        answers, counts = np.unique(selected, return_counts=True)
+        answer_stats = [
+            AnswerStat(answer_id=int(answer_id), selected_count=int(count))
+            for answer_id, count in zip(answers, counts)
+        ]
+
+    buckets = np.bincount(np.minimum(scores // 10, BUCKET_COUNT - 1).astype(np.int64), minlength=BUCKET_COUNT)
+
+    QuestionStat.objects.filter(question__quiz_id=quiz_id).delete()
+    AnswerStat.objects.filter(answer__question__quiz_id=quiz_id).delete()
+    QuizScoreBucket.objects.filter(quiz_id=quiz_id).delete()
+    QuestionStat.objects.bulk_create(question_stats)
+    AnswerStat.objects.bulk_create(answer_stats)
+    QuizScoreBucket.objects.bulk_create([
+        QuizScoreBucket(quiz_id=quiz_id, bucket=bucket, count=int(count))
+        for bucket, count in enumerate(buckets) if count
+    ])
+    return len(scores)
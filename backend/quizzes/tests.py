@@ -1,3 +1,212 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from courses.models import Subject, Topic, Lesson
+from .models import Quiz, Question, Answer, AttemptAnswer, QuestionStat, AnswerStat, QuizScoreBucket
+from .serializers import AnswerSerializer
+
+
+class QuizApiTestCase(APITestCase):
+    """Builds a lesson with a two-question quiz."""
+    
+    def setUp(self):
+        cache.clear()
+        subject = Subject.objects.create(title='Python', description='Learn Python', slug='python')
+        topic = Topic.objects.create(subject=subject, title='Basics')
+        self.lesson = Lesson.objects.create(topic=topic, title='Variables', content_html='<p>x</p>', estimated_time=5)
+        self.quiz = Quiz.objects.create(lesson=self.lesson, title='Variables quiz')
+        self.correct = {}
+        self.wrong = {}
+        for i in range(2):
+            question = Question.objects.create(quiz=self.quiz, text=f'Question {i}')
+            self.correct[question.pk] = Answer.objects.create(question=question, text='Right', is_correct=True).pk
+            self.wrong[question.pk] = Answer.objects.create(question=question, text='Wrong').pk
+
+
+class QuizDetailConditionalGetTests(QuizApiTestCase):
+    """Tests for ETag support on the quiz payload."""
+    
+    def test_matching_etag_returns_304(self):
+        """Test that an unchanged quiz is answered with a 304."""
+        etag = self.client.get(f'/quizzes/{self.lesson.pk}/')['ETag']
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/quizzes/{self.lesson.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_answer_edit_changes_etag(self):
+        """Test that editing an answer invalidates the quiz ETag."""
+        etag = self.client.get(f'/quizzes/{self.lesson.pk}/')['ETag']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Answer.objects.get(pk=next(iter(self.wrong.values()))).save()
+        
+        response = self.client.get(f'/quizzes/{self.lesson.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class QuizDetailTests(QuizApiTestCase):
+    """Tests for the prefetched, cached quiz payload."""
+    
+    def test_payload_is_built_in_constant_queries(self):
+        """Test that the payload costs the same queries however many questions there are."""
+        for i in range(5):
+            question = Question.objects.create(quiz=self.quiz, text=f'Extra {i}')
+            Answer.objects.create(question=question, text='A')
+        
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/quizzes/{self.lesson.pk}/')
+        self.assertEqual(len(response.data['questions']), 7)
+    
+    def test_cached_payload_skips_database(self):
+        """Test that repeated reads are served from the cache."""
+        self.client.get(f'/quizzes/{self.lesson.pk}/')
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/quizzes/{self.lesson.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_is_correct_never_leaks(self):
+        """Test that no answer in the payload exposes is_correct."""
+        for _ in range(2):
+            response = self.client.get(f'/quizzes/{self.lesson.pk}/')
+            self.assertNotIn('is_correct', response.content.decode())
+            for question in response.data['questions']:
+                for answer in question['answers']:
+                    self.assertEqual(set(answer), {'id', 'text'})
+    
+    def test_answer_serializer_excludes_is_correct(self):
+        """Test that the quiz-taking serializer itself never declares is_correct."""
+        self.assertNotIn('is_correct', AnswerSerializer().fields)
+    
+    def test_missing_quiz_returns_404(self):
+        """Test that a lesson without a quiz is a 404, not a cached empty payload."""
+        lesson = Lesson.objects.create(topic=self.lesson.topic, title='Loops', content_html='<p>y</p>', estimated_time=5)
+        
+        response = self.client.get(f'/quizzes/{lesson.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QuizSubmitTests(QuizApiTestCase):
+    """Tests for batch grading with the cached answer key."""
+    
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(email='student@example.com', password='pass')
+        self.client.force_authenticate(self.user)
+    
+    def test_grading_counts_correct_answers(self):
+        """Test that only correct answers score, whatever the id types."""
+        q1, q2 = self.correct
+        answers = {str(q1): self.correct[q1], str(q2): str(self.wrong[q2]), 'bogus': 1}
+        response = self.client.post(f'/quizzes/submit/{self.quiz.pk}/', {'answers': answers}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['correct_count'], 1)
+        self.assertEqual(response.data['score'], 50)
+    
+    def test_warm_answer_key_needs_no_answer_queries(self):
+        """Test that a warm submission only loads the quiz and writes the attempt and its stats."""
+        answers = {str(q): a for q, a in self.correct.items()}
+        self.client.post(f'/quizzes/submit/{self.quiz.pk}/', {'answers': answers}, format='json')
+        
+        # quiz, savepoint, user lock, previous best, attempt, attempt answers, 3 stat upserts, release
+        with self.assertNumQueries(10):
+            response = self.client.post(f'/quizzes/submit/{self.quiz.pk}/', {'answers': answers}, format='json')
+        self.assertEqual(response.data['score'], 100)
+    
+    def test_answer_edit_refreshes_key(self):
+        """Test that changing the correct answer takes effect immediately."""
+        q1 = next(iter(self.correct))
+        self.client.post(f'/quizzes/submit/{self.quiz.pk}/', {'answers': {}}, format='json')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Answer.objects.filter(pk=self.correct[q1]).update(is_correct=False)
+            wrong = Answer.objects.get(pk=self.wrong[q1])
+            wrong.is_correct = True
+            wrong.save()
+        
+        response = self.client.post(f'/quizzes/submit/{self.quiz.pk}/', {'answers': {str(q1): self.wrong[q1]}}, format='json')
+        self.assertEqual(response.data['correct_count'], 1)
+
+
+class QuizStatsTests(QuizApiTestCase):
+    """Tests for per-answer records and incremental item statistics."""
+    
+    def setUp(self):
+        super().setUp()
+        self.q1, self.q2 = self.correct
+        self.instructor = get_user_model().objects.create_user(email='teacher@example.com', password='pass', role='instructor')
+    
+    def submit(self, email, answers):
+        user = get_user_model().objects.create_user(email=email, password='pass')
+        self.client.force_authenticate(user)
+        self.client.post(f'/quizzes/submit/{self.quiz.pk}/', {'answers': answers}, format='json')
+    
+    def submit_sample(self):
+        self.submit('a@example.com', {self.q1: self.correct[self.q1], self.q2: self.correct[self.q2]})
+        self.submit('b@example.com', {self.q1: self.correct[self.q1], self.q2: self.wrong[self.q2]})
+        self.submit('c@example.com', {self.q1: self.wrong[self.q1]})
+    
+    def stats(self):
+        self.client.force_authenticate(self.instructor)
+        return self.client.get(f'/quizzes/stats/{self.quiz.pk}/')
+    
+    def test_submit_records_every_question(self):
+        """Test that unanswered questions are stored with no answer."""
+        self.submit('c@example.com', {self.q1: self.wrong[self.q1]})
+        
+        rows = dict(AttemptAnswer.objects.values_list('question_id', 'answer_id'))
+        self.assertEqual(rows, {self.q1: self.wrong[self.q1], self.q2: None})
+    
+    def test_stats_are_maintained_on_submit(self):
+        """Test difficulty, discrimination, selections and histogram after a few attempts."""
+        self.submit_sample()
+        response = self.stats()
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['attempt_count'], 3)
+        self.assertEqual(response.data['score_histogram'], [1, 0, 0, 0, 0, 1, 0, 0, 0, 1])
+        q1, q2 = response.data['questions']
+        self.assertAlmostEqual(q1['difficulty'], 2 / 3)
+        self.assertAlmostEqual(q2['difficulty'], 1 / 3)
+        self.assertGreater(q1['discrimination'], 0)
+        selected = {answer['id']: answer['selected_count'] for answer in q2['answers']}
+        self.assertEqual(selected, {self.correct[self.q2]: 1, self.wrong[self.q2]: 1})
+    
+    def test_stats_queries_do_not_grow_with_attempts(self):
+        """Test that the stats endpoint reads aggregates, not attempts."""
+        self.submit_sample()
+        self.client.force_authenticate(self.instructor)
+        
+        # quiz, buckets, questions + stats, answers + stats
+        with self.assertNumQueries(4):
+            self.client.get(f'/quizzes/stats/{self.quiz.pk}/')
+    
+    def test_students_cannot_read_stats(self):
+        """Test that the stats endpoint is restricted to instructors."""
+        self.submit('a@example.com', {})
+        response = self.client.get(f'/quizzes/stats/{self.quiz.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_recompute_matches_incremental_stats(self):
+        """Test that the NumPy backfill rebuilds the same aggregates."""
+        self.submit_sample()
+        before = self.stats().data
+        
+        QuestionStat.objects.all().delete()
+        AnswerStat.objects.all().delete()
+        QuizScoreBucket.objects.all().delete()
+        call_command('recompute_quiz_stats', stdout=io.StringIO())
+        
+        after = self.stats().data
+        self.assertEqual(after['score_histogram'], before['score_histogram'])
+        for old, new in zip(before['questions'], after['questions']):
+            self.assertEqual(new['answers'], old['answers'])
+            self.assertAlmostEqual(new['difficulty'], old['difficulty'])
+            self.assertAlmostEqual(new['discrimination'], old['discrimination'])
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import QuizDetailView, QuizSubmitView
+from .views import QuizDetailView, QuizSubmitView, QuizStatsView
 
 urlpatterns = [
     path('<int:lesson_id>/', QuizDetailView.as_view(), name='quiz-detail'),
     path('submit/<int:quiz_id>/', QuizSubmitView.as_view(), name='quiz-submit'),
+    path('stats/<int:quiz_id>/', QuizStatsView.as_view(), name='quiz-stats'),
 ]
@@ -1,15 +1,56 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max, Prefetch
+from django.http import Http404
 from .models import Quiz, QuizAttempt, Question, Answer
 from .serializers import QuizSerializer
+from .grading import get_answer_key, grade
+from .stats import record_attempt, quiz_stats
+from accounts.permissions import IsInstructor
+from leaderboards.boards import award_on_commit
 from django.shortcuts import get_object_or_404
+from courses.cache import get_or_build, versioned_condition
+from .cache import quiz_version_key
 
 class QuizDetailView(generics.RetrieveAPIView):
-    queryset = Quiz.objects.all()
+    """
+    Returns a lesson's quiz for taking: questions and answer texts.
+    
+    Performance Note:
+    - Built in three queries (quiz, questions, answers) via prefetch_related.
+    - Cached per quiz version; Question/Answer edits bump it (signals.py).
+    
+    Security:
+    - `is_correct` is deferred here, not excluded: if AnswerSerializer ever
+      listed it, Django would load it lazily (one query per answer) and it
+      would be sent. QuizDetailTests fail on either the extra queries or the
+      field, so keep them alongside any serializer change.
+    """
+    queryset = Quiz.objects.only('id', 'lesson_id', 'title').prefetch_related(
+        Prefetch(
+            'questions',
+            queryset=Question.objects.only('id', 'quiz_id', 'text').order_by('id').prefetch_related(
+                Prefetch('answers', queryset=Answer.objects.only('id', 'question_id', 'text').order_by('id'))
+            ),
+        )
+    )
     serializer_class = QuizSerializer
     lookup_field = 'lesson_id' # Access quiz by lesson_id
 
+    @versioned_condition(lambda lesson_id, **kwargs: quiz_version_key(lesson_id))
+    def get(self, request, lesson_id, *args, **kwargs):
+        def build():
+            quiz = self.get_queryset().filter(lesson_id=lesson_id).first()
+            if quiz is None:
+                raise Http404
+            return self.get_serializer(quiz).data
+
+        payload = get_or_build(f'quizzes:detail:{lesson_id}', quiz_version_key(lesson_id), build)
+        return Response(payload)
+
 class QuizSubmitView(APIView):
     """
     Handles quiz submission and grading.
@@ -17,32 +58,58 @@ class QuizSubmitView(APIView):
     Security:
     - We do not trust the client to calculate the score.
     - We check their answers against the database strictly on the backend.
+    
+    Performance:
+    - Grading uses the cached answer key (grading.py): no per-answer queries.
+    - Per-answer records and item stats are written in a constant number of
+      statements (stats.py), whatever the number of questions.
+    - Leaderboard points go to Redis after commit (leaderboards/boards.py).
+      Submits of one user are serialized so retakes only score improvements.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, quiz_id):
-        # ... logic ...
-        quiz = get_object_or_404(Quiz, pk=quiz_id)
+        quiz = get_object_or_404(
+            Quiz.objects.select_related('lesson__topic').only('id', 'lesson_id', 'lesson__topic__subject_id'), pk=quiz_id
+        )
         answers_data = request.data.get('answers', {}) # {question_id: answer_id}
+        if not isinstance(answers_data, dict):
+            return Response({'error': 'answers must be an object of question_id: answer_id'}, status=status.HTTP_400_BAD_REQUEST)
         
-        score = 0
-        total_questions = quiz.questions.count()
+        # Answer key is cached per quiz version: no per-answer DB lookups.
+        answer_key = get_answer_key(quiz)
+        total_questions = len(answer_key)
         
         if total_questions == 0:
             return Response({'error': 'Quiz has no questions'}, status=status.HTTP_400_BAD_REQUEST)
 
-        for q_id, a_id in answers_data.items():
-            try:
-                # Backend validation of correctness
-                answer = Answer.objects.get(pk=a_id, question_id=q_id)
-                if answer.is_correct:
-                    score += 1
-            except Answer.DoesNotExist:
-                continue
+        choices = grade(answer_key, answers_data)
+        score = sum(is_correct for _, is_correct in choices.values())
                 
         # Simple percentage score logic or raw count
         final_score = (score / total_questions) * 100
         
-        QuizAttempt.objects.create(user=request.user, quiz=quiz, score=final_score)
+        with transaction.atomic():
+            # Lock the user row so concurrent submits see each other's attempts
+            # (attempt rows cannot be locked before the first one exists);
+            # otherwise both would score their full improvement.
+            list(get_user_model().objects.select_for_update().filter(pk=request.user.pk).values_list('pk', flat=True))
+            previous_best = QuizAttempt.objects.filter(user=request.user, quiz=quiz).aggregate(best=Max('score'))['best'] or 0
+            attempt = QuizAttempt.objects.create(user=request.user, quiz=quiz, score=round(final_score))
+            record_attempt(attempt, choices)
+            # Retakes only score what they improve on the best attempt.
+            award_on_commit(request.user.pk, {quiz.lesson.topic.subject_id: max(0, attempt.score - previous_best)})
         
         return Response({'score': final_score, 'correct_count': score, 'total': total_questions})
+
+class QuizStatsView(APIView):
+    """
+    Item analysis for instructors: per-question difficulty, discrimination
+    and answer distribution, plus the quiz score histogram.
+    Reads the running aggregates only (stats.py), never the attempts.
+    """
+    permission_classes = [IsInstructor]
+
+    def get(self, request, quiz_id):
+        quiz = get_object_or_404(Quiz.objects.only('id'), pk=quiz_id)
+        return Response(quiz_stats(quiz))
@@ -25,6 +25,9 @@ class Settings:
     JAVASCRIPT_IMAGE: str = "code-sandbox-javascript:latest"
     SQL_IMAGE: str = "code-sandbox-sql:latest"
     
+    # Health monitor refresh interval (Docker ping + image lookups)
+    HEALTH_CHECK_INTERVAL_SECONDS: int = int(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+    
     # Supported languages
     SUPPORTED_LANGUAGES: list = ["python", "javascript", "js", "sql"]
     
@@ -0,0 +1,70 @@
+"""
+Background health monitor for the executor service.
+
+Docker is probed on a fixed interval instead of per request, so `/health`
+(and load-balancer probes hitting it) only read the last snapshot.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HealthSnapshot:
+    docker_ready: bool = False
+    available_images: list = field(default_factory=list)
+    checked_at: float = 0.0
+
+
+class HealthMonitor:
+    """Periodically refreshes Docker and sandbox image availability."""
+
+    def __init__(self, executor, interval: int = settings.HEALTH_CHECK_INTERVAL_SECONDS):
+        self._executor = executor
+        self._interval = interval
+        self._snapshot = HealthSnapshot()
+        self._task = None
+
+    @property
+    def snapshot(self) -> HealthSnapshot:
+        return self._snapshot
+
+    async def refresh(self) -> HealthSnapshot:
+        """Probe Docker once and replace the cached snapshot."""
+        loop = asyncio.get_running_loop()
+        docker_ready = await loop.run_in_executor(None, self._executor.check_health)
+        available = []
+        if docker_ready:
+            available = await loop.run_in_executor(None, self._executor.list_images)
+        self._snapshot = HealthSnapshot(docker_ready, available, time.time())
+        return self._snapshot
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Health refresh failed")
+                self._snapshot = HealthSnapshot(checked_at=time.time())
+
+    async def start(self) -> HealthSnapshot:
+        """Take the first snapshot and start the refresh loop."""
+        snapshot = await self.refresh()
+        self._task = asyncio.create_task(self._run())
+        return snapshot
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
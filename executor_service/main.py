@@ -9,24 +9,27 @@ import logging
 from config import settings
 from models import ExecuteRequest, ExecuteResponse, HealthResponse
 from executor import executor
+from health import HealthMonitor
 
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+health_monitor = HealthMonitor(executor)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
     logger.info("Starting Code Executor Service...")
     
-    # Check Docker connection
-    if executor.check_health():
+    # Check Docker connection and keep the result fresh in the background
+    snapshot = await health_monitor.start()
+    if snapshot.docker_ready:
         logger.info("✓ Docker connection established")
-        available = executor.list_images()
-        if available:
-            logger.info(f"✓ Available sandbox images: {available}")
+        if snapshot.available_images:
+            logger.info(f"✓ Available sandbox images: {snapshot.available_images}")
         else:
             logger.warning("⚠ No sandbox images found. Please build them first.")
     else:
@@ -35,6 +38,7 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("Shutting down Code Executor Service...")
+    await health_monitor.stop()
 
 
 app = FastAPI(
@@ -56,12 +60,14 @@ app.add_middleware(
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint."""
-    docker_ready = executor.check_health()
+    """Health check endpoint. Served from the monitor's cached snapshot."""
+    snapshot = health_monitor.snapshot
     return HealthResponse(
-        status="healthy" if docker_ready else "degraded",
-        executor_ready=docker_ready,
-        supported_languages=settings.SUPPORTED_LANGUAGES
+        status="healthy" if snapshot.docker_ready else "degraded",
+        executor_ready=snapshot.docker_ready,
+        supported_languages=settings.SUPPORTED_LANGUAGES,
+        available_images=snapshot.available_images,
+        checked_at=snapshot.checked_at
     )
 
 
@@ -50,3 +50,5 @@ class HealthResponse(BaseModel):
     status: str
     executor_ready: bool
     supported_languages: list[str]
+    available_images: list[str] = Field(default_factory=list, description="Languages whose sandbox image is built")
+    checked_at: float = Field(default=0.0, description="Unix time of the last Docker probe")
@@ -0,0 +1,6 @@
+"""Unit tests for the executor service; run with `python -m pytest tests` from executor_service/."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
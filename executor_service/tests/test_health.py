@@ -0,0 +1,134 @@
+"""Tests for the background health monitor (health.py)."""
+
+import asyncio
+
+from health import HealthMonitor, HealthSnapshot
+
+
+class FakeExecutor:
+    """Stands in for SandboxExecutor: Docker state is set by the test, probes are counted."""
+
+    def __init__(self, healthy=True, images=("code-sandbox-python:latest",)):
+        self.healthy = healthy
+        self.images = list(images)
+        self.error = None
+        self.health_checks = 0
+        self.image_lookups = 0
+
+    def check_health(self):
+        self.health_checks += 1
+        if self.error:
+            raise self.error
+        return self.healthy
+
+    def list_images(self):
+        self.image_lookups += 1
+        return self.images
+
+
+def test_snapshot_is_empty_before_start():
+    monitor = HealthMonitor(FakeExecutor())
+    assert monitor.snapshot == HealthSnapshot()
+    assert not monitor.snapshot.docker_ready
+
+
+def test_start_takes_the_first_snapshot():
+    executor = FakeExecutor()
+
+    async def scenario():
+        monitor = HealthMonitor(executor, interval=60)
+        snapshot = await monitor.start()
+        await monitor.stop()
+        return monitor, snapshot
+
+    monitor, snapshot = asyncio.run(scenario())
+    assert snapshot.docker_ready and snapshot.available_images == ["code-sandbox-python:latest"]
+    assert snapshot.checked_at > 0
+    assert monitor.snapshot is snapshot
+
+
+def test_reads_use_the_cached_snapshot():
+    executor = FakeExecutor()
+
+    async def scenario():
+        monitor = HealthMonitor(executor, interval=60)
+        await monitor.start()
+        snapshots = [monitor.snapshot for _ in range(100)]
+        await monitor.stop()
+        return snapshots
+
+    snapshots = asyncio.run(scenario())
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert (executor.health_checks, executor.image_lookups) == (1, 1)
+
+
+def test_refreshes_on_the_interval():
+    executor = FakeExecutor()
+
+    async def scenario():
+        monitor = HealthMonitor(executor, interval=0.05)
+        await monitor.start()
+        await asyncio.sleep(0.02)
+        early = executor.health_checks
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+        return early
+
+    early = asyncio.run(scenario())
+    assert early == 1
+    assert 3 <= executor.health_checks <= 6
+
+
+def test_stop_ends_the_refresh_loop():
+    executor = FakeExecutor()
+
+    async def scenario():
+        monitor = HealthMonitor(executor, interval=0.01)
+        await monitor.start()
+        await monitor.stop()
+        checks = executor.health_checks
+        await asyncio.sleep(0.05)
+        return checks
+
+    assert asyncio.run(scenario()) == executor.health_checks
+
+
+def test_unhealthy_transitions():
+    executor = FakeExecutor()
+
+    async def scenario():
+        monitor = HealthMonitor(executor, interval=60)
+        states = [(await monitor.refresh()).docker_ready]
+
+        executor.healthy = False
+        snapshot = await monitor.refresh()
+        states.append(snapshot.docker_ready)
+        assert snapshot.available_images == []
+
+        executor.healthy = True
+        states.append((await monitor.refresh()).docker_ready)
+        return states
+
+    assert asyncio.run(scenario()) == [True, False, True]
+    assert executor.image_lookups == 2  # images are not looked up while Docker is down
+
+
+def test_failed_refresh_marks_unhealthy_and_recovers(caplog):
+    executor = FakeExecutor()
+
+    async def scenario():
+        monitor = HealthMonitor(executor, interval=0.02)
+        await monitor.start()
+        executor.error = RuntimeError("docker socket gone")
+        await asyncio.sleep(0.05)
+        failed = monitor.snapshot
+        executor.error = None
+        await asyncio.sleep(0.05)
+        recovered = monitor.snapshot
+        await monitor.stop()
+        return failed, recovered
+
+    failed, recovered = asyncio.run(scenario())
+    assert not failed.docker_ready and failed.available_images == [] and failed.checked_at > 0
+    assert recovered.docker_ready
+    assert "Health refresh failed" in caplog.text
@@ -0,0 +1,160 @@
+"""
+Result cache for Code-Daily MCP tools.
+
+Tool results are keyed by tool name and normalized arguments, so the same
+topic asked again (any case or spacing) skips the Perplexity round trip.
+
+Two tiers:
+- an in-memory LRU for repeats within a session;
+- a SQLite file so results survive restarts and are shared by every
+  server process on the machine.
+
+Each tool has its own TTL; tools without one are never cached. Both tiers
+are size-bounded: the LRU drops its least recently used entry, and SQLite
+deletes expired rows and then the least recently used ones.
+
+SQLite calls run in a worker thread (asyncio.to_thread), so a slow disk or
+a lock held by another process never stalls the event loop. A locked or
+broken cache file only costs a miss: SQLite errors are logged and ignored.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT = 2.0  # seconds to wait for another process's write lock
+
+
+def normalize(value):
+    """Case- and whitespace-insensitive form of tool arguments."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    return value
+
+
+def cache_key(tool: str, arguments: dict) -> str:
+    payload = json.dumps([tool, normalize(arguments)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ToolCache:
+    """Two-tier (memory LRU + SQLite) cache of tool results with per-tool TTLs."""
+
+    def __init__(self, path: Optional[str], ttls: dict[str, int], memory_size: int = 256, disk_size: int = 5000):
+        self.ttls = ttls
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._db = None
+        self._db_lock = threading.Lock()  # one connection, used from worker threads
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS tool_results ("
+                    " key TEXT PRIMARY KEY, tool TEXT NOT NULL, value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS tool_results_used_at ON tool_results (used_at)")
+                self._db.commit()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Tool cache file {path} unavailable, caching in memory only: {e!r}")
+                self.close()
+
+    async def get(self, tool: str, arguments: dict) -> Optional[str]:
+        if tool not in self.ttls:
+            return None
+        key = cache_key(tool, arguments)
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._memory.move_to_end(key)
+                return entry[1]
+            del self._memory[key]
+
+        if self._db is None:
+            return None
+        try:
+            row = await asyncio.to_thread(self._read, key, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Tool cache read failed, treating as a miss: {e!r}")
+            return None
+        if row is None:
+            return None
+        self._remember(key, row[1], row[0])
+        return row[0]
+
+    async def set(self, tool: str, arguments: dict, value: str) -> None:
+        ttl = self.ttls.get(tool)
+        if not ttl:
+            return
+        key = cache_key(tool, arguments)
+        now = time.time()
+        self._remember(key, now + ttl, value)
+
+        if self._db is None:
+            return
+        try:
+            await asyncio.to_thread(self._write, key, tool, value, now + ttl, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Tool cache write failed, result kept in memory only: {e!r}")
+
+    def _read(self, key: str, now: float) -> Optional[tuple[str, float]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM tool_results WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                try:
+                    self._db.execute("UPDATE tool_results SET used_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                except sqlite3.OperationalError:
+                    # Locked by another writer: the hit stands, only its recency is lost.
+                    self._db.rollback()
+            return row
+
+    def _write(self, key: str, tool: str, value: str, expires_at: float, now: float) -> None:
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tool_results (key, tool, value, expires_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, tool, value, expires_at, now),
+                )
+                self._db.execute("DELETE FROM tool_results WHERE expires_at <= ?", (now,))
+                self._db.execute(
+                    "DELETE FROM tool_results WHERE key IN ("
+                    " SELECT key FROM tool_results ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_size,),
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                raise
+
+    def _remember(self, key: str, expires_at: float, value: str) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
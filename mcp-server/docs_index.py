@@ -0,0 +1,248 @@
+"""
+Offline documentation index for fetch_docs.
+
+Plain-text docs in `docs_corpus/` (one topic per file, starting with
+`title:` and `language:` lines) are compiled into a single binary file,
+an inverted index ranked with BM25. The file is memory-mapped, and its
+arrays are read in place through typed memoryviews, so opening it costs
+nothing and a lookup only touches the postings of the query terms.
+
+File layout (native little-endian):
+    header   magic, version, doc count, term count, average doc length,
+             then the byte offset of each section below
+    term_offsets     uint32[n_terms + 1]  slices of term_bytes (terms sorted)
+    term_bytes       utf-8 terms, concatenated
+    posting_offsets  uint32[n_terms + 1]  slices of the two posting arrays
+    posting_docs     uint32[]             doc ids
+    posting_tfs      uint16[]             term frequency in that doc
+    doc_lengths      uint32[n_docs]
+    doc_offsets      uint32[n_docs + 1]   slices of doc_bytes
+    doc_bytes        "title\\nlanguage\\nbody" per doc, utf-8
+
+Rebuild after editing the corpus with `python docs_index.py`; the server
+also rebuilds it on startup when the corpus is newer than the index.
+"""
+
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(HERE, "docs_corpus")
+INDEX_PATH = os.getenv("MCP_DOCS_INDEX", os.path.join(HERE, "docs_index.bin"))
+
+MAGIC = b"CDDX"
+VERSION = 1
+HEADER = struct.Struct("<4sHxxIIf8Q")
+
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 3  # title terms count as this many occurrences
+MIN_SCORE = 1.0
+
+TOKEN = re.compile(r"[a-z0-9_+#]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by do does for from how i in is it of on or the this to use using what when with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+@dataclass
+class Doc:
+    title: str
+    language: str
+    text: str
+    score: float = 0.0
+
+
+def read_corpus(corpus_dir: str = CORPUS_DIR) -> list[Doc]:
+    docs = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith((".md", ".txt")):
+            continue
+        with open(os.path.join(corpus_dir, name), encoding="utf-8") as f:
+            meta = {}
+            for line in f:
+                if not line.strip():
+                    break
+                key, _, value = line.partition(":")
+                meta[key.strip()] = value.strip()
+            docs.append(Doc(meta.get("title", name), meta.get("language", "general"), f.read().strip()))
+    return docs
+
+
+def build_index(corpus_dir: str = CORPUS_DIR, path: str = INDEX_PATH) -> int:
+    """Compile the corpus into the index file at `path`; returns the doc count."""
+    docs = read_corpus(corpus_dir)
+    postings: dict[str, dict[int, int]] = {}
+    lengths = array("I")
+    for doc_id, doc in enumerate(docs):
+        counts: dict[str, int] = {}
+        for token in tokenize(doc.title):
+            counts[token] = counts.get(token, 0) + TITLE_WEIGHT
+        for token in tokenize(doc.text):
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            postings.setdefault(token, {})[doc_id] = min(tf, 0xFFFF)
+        lengths.append(sum(counts.values()))
+
+    terms = sorted(postings)
+    term_offsets, term_bytes = array("I", [0]), bytearray()
+    posting_offsets, posting_docs, posting_tfs = array("I", [0]), array("I"), array("H")
+    for term in terms:
+        term_bytes += term.encode()
+        term_offsets.append(len(term_bytes))
+        for doc_id, tf in sorted(postings[term].items()):
+            posting_docs.append(doc_id)
+            posting_tfs.append(tf)
+        posting_offsets.append(len(posting_docs))
+
+    doc_offsets, doc_bytes = array("I", [0]), bytearray()
+    for doc in docs:
+        doc_bytes += f"{doc.title}\n{doc.language}\n{doc.text}".encode()
+        doc_offsets.append(len(doc_bytes))
+
+    sections = [term_offsets, term_bytes, posting_offsets, posting_docs, posting_tfs, lengths, doc_offsets, doc_bytes]
+    average = sum(lengths) / len(docs) if docs else 0.0
+    offsets, position = [], HEADER.size
+    for section in sections:
+        position += -position % 8
+        offsets.append(position)
+        position += len(bytes(section))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(docs), len(terms), average, *offsets))
+        for offset, section in zip(offsets, sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(bytes(section))
+    os.replace(tmp_path, path)
+    return len(docs)
+
+
+class DocsIndex:
+    """Read-only BM25 search over a memory-mapped index file."""
+
+    def __init__(self, path: str = INDEX_PATH):
+        if sys.byteorder != "little":
+            raise OSError("docs index is stored little-endian")
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n_docs, self.n_terms, self.average_length, *offsets = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise OSError(f"{path} is not a version {VERSION} docs index")
+        view = memoryview(self._map)
+        n_postings = struct.unpack_from("<I", self._map, offsets[2] + 4 * self.n_terms)[0]
+        sizes = [
+            4 * (self.n_terms + 1), offsets[2] - offsets[1], 4 * (self.n_terms + 1), 4 * n_postings,
+            2 * n_postings, 4 * self.n_docs, 4 * (self.n_docs + 1), len(self._map) - offsets[7],
+        ]
+        (self._term_offsets, self._term_bytes, self._posting_offsets, self._posting_docs,
+         self._posting_tfs, self._doc_lengths, self._doc_offsets, self._doc_bytes) = [
+            view[offset:offset + size] for offset, size in zip(offsets, sizes)
+        ]
+        self._term_offsets = self._term_offsets.cast("I")
+        self._posting_offsets = self._posting_offsets.cast("I")
+        self._posting_docs = self._posting_docs.cast("I")
+        self._posting_tfs = self._posting_tfs.cast("H")
+        self._doc_lengths = self._doc_lengths.cast("I")
+        self._doc_offsets = self._doc_offsets.cast("I")
+
+    def _term(self, i: int) -> bytes:
+        return bytes(self._term_bytes[self._term_offsets[i]:self._term_offsets[i + 1]])
+
+    def _find(self, term: str) -> Optional[int]:
+        """Binary search of the sorted term table."""
+        target, low, high = term.encode(), 0, self.n_terms
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.n_terms and self._term(low) == target else None
+
+    def doc(self, doc_id: int, score: float = 0.0) -> Doc:
+        raw = bytes(self._doc_bytes[self._doc_offsets[doc_id]:self._doc_offsets[doc_id + 1]]).decode()
+        title, language, text = raw.split("\n", 2)
+        return Doc(title, language, text, score)
+
+    def search(self, query: str, language: str = "general", limit: int = 3) -> list[tuple[Doc, int]]:
+        """Top docs by BM25, each with how many distinct query terms it contains."""
+        scores: dict[int, float] = {}
+        matched: dict[int, int] = {}
+        for term in set(tokenize(query)):
+            i = self._find(term)
+            if i is None:
+                continue
+            start, end = self._posting_offsets[i], self._posting_offsets[i + 1]
+            idf = math.log(1 + (self.n_docs - (end - start) + 0.5) / (end - start + 0.5))
+            for p in range(start, end):
+                doc_id, tf = self._posting_docs[p], self._posting_tfs[p]
+                norm = K1 * (1 - B + B * self._doc_lengths[doc_id] / self.average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+
+        results = []
+        for doc_id in sorted(scores, key=scores.get, reverse=True):
+            doc = self.doc(doc_id, scores[doc_id])
+            if language in ("general", doc.language):
+                results.append((doc, matched[doc_id]))
+                if len(results) == limit:
+                    break
+        return results
+
+    def lookup(self, topic: str, language: str = "general") -> Optional[Doc]:
+        """
+        The doc answering `topic`, or None. Only confident hits count: the
+        best doc must contain every query term, have one of them (besides
+        its language) in its title, and score at least MIN_SCORE. Anything
+        the corpus does not cover goes to the LLM instead.
+        """
+        terms = set(tokenize(topic))
+        if not terms:
+            return None
+        results = self.search(topic, language, limit=1)
+        if not results:
+            return None
+        doc, matched = results[0]
+        if matched < len(terms) or doc.score < MIN_SCORE:
+            return None
+        if not terms & (set(tokenize(doc.title)) - {doc.language}):
+            return None
+        return doc
+
+
+_index: dict[str, Optional[DocsIndex]] = {}
+
+
+def get_docs_index() -> Optional[DocsIndex]:
+    """
+    The process-wide index, built first if the file is missing or older than
+    the corpus. None if it cannot be opened, so fetch_docs falls back to the LLM.
+    """
+    if INDEX_PATH not in _index:
+        try:
+            corpus_mtime = max(
+                (entry.stat().st_mtime for entry in os.scandir(CORPUS_DIR)), default=0.0
+            )
+            if not os.path.exists(INDEX_PATH) or os.path.getmtime(INDEX_PATH) < corpus_mtime:
+                build_index()
+            _index[INDEX_PATH] = DocsIndex()
+        except (OSError, ValueError):
+            _index[INDEX_PATH] = None
+    return _index[INDEX_PATH]
+
+
+if __name__ == "__main__":
+    count = build_index()
+    print(f"Indexed {count} docs from {CORPUS_DIR} into {INDEX_PATH}")
@@ -12,12 +12,16 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from cache import ToolCache
+from docs_index import get_docs_index
 from tools import (
     fetch_docs,
     search_code_examples,
     explain_concept,
     get_interview_questions,
-    get_learning_resources
+    get_learning_resources,
+    open_clients,
+    close_clients
 )
 
 # Load environment variables
@@ -26,6 +30,20 @@ load_dotenv()
 # Initialize MCP server
 server = Server("code-daily-docs")
 
+# Seconds a tool result is reused for the same (normalized) arguments.
+# search_code_examples is left out: its GitHub results should stay live.
+CACHE_TTLS = {
+    "fetch_docs": 7 * 24 * 3600,
+    "explain_concept": 24 * 3600,
+    "get_interview_questions": 24 * 3600,
+    "get_learning_resources": 3 * 24 * 3600,
+}
+
+tool_cache = ToolCache(
+    os.getenv("MCP_CACHE_PATH", os.path.expanduser("~/.cache/code-daily-mcp/tools.sqlite3")) or None,
+    CACHE_TTLS,
+)
+
 
 @server.list_tools()
 async def list_tools() -> list[Tool]:
@@ -45,6 +63,11 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Programming language context",
                         "enum": ["python", "javascript", "typescript", "java", "cpp", "sql", "general"]
+                    },
+                    "bypass_cache": {
+                        "type": "boolean",
+                        "description": "Ignore cached results and fetch a fresh answer",
+                        "default": False
                     }
                 },
                 "required": ["topic"]
@@ -94,6 +117,11 @@ async def list_tools() -> list[Tool]:
                         "type": "boolean",
                         "description": "Include code examples in explanation",
                         "default": True
+                    },
+                    "bypass_cache": {
+                        "type": "boolean",
+                        "description": "Ignore cached results and fetch a fresh answer",
+                        "default": False
                     }
                 },
                 "required": ["concept"]
@@ -119,6 +147,11 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Number of questions to generate (1-10)",
                         "default": 5
+                    },
+                    "bypass_cache": {
+                        "type": "boolean",
+                        "description": "Ignore cached results and fetch a fresh answer",
+                        "default": False
                     }
                 },
                 "required": ["topic"]
@@ -139,6 +172,11 @@ async def list_tools() -> list[Tool]:
                         "description": "Type of resource",
                         "enum": ["all", "tutorial", "video", "course", "book"],
                         "default": "all"
+                    },
+                    "bypass_cache": {
+                        "type": "boolean",
+                        "description": "Ignore cached results and fetch a fresh answer",
+                        "default": False
                     }
                 },
                 "required": ["topic"]
@@ -149,7 +187,14 @@ async def list_tools() -> list[Tool]:
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
-    """Handle tool calls."""
+    """Handle tool calls, answering repeats from the cache unless bypass_cache is set."""
+    arguments = dict(arguments)
+    bypass_cache = arguments.pop("bypass_cache", False)
+    if not bypass_cache:
+        cached = await tool_cache.get(name, arguments)
+        if cached is not None:
+            return [TextContent(type="text", text=cached)]
+    
     try:
         if name == "fetch_docs":
             result = await fetch_docs(
@@ -181,21 +226,28 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             )
         else:
             result = f"Unknown tool: {name}"
-        
-        return [TextContent(type="text", text=result)]
     
     except Exception as e:
         return [TextContent(type="text", text=f"Error: {str(e)}")]
+    
+    await tool_cache.set(name, arguments, result)
+    return [TextContent(type="text", text=result)]
 
 
 async def main():
     """Run the MCP server."""
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options()
-        )
+    open_clients()
+    get_docs_index()
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options()
+            )
+    finally:
+        await close_clients()
+        tool_cache.close()
 
 
 if __name__ == "__main__":
@@ -18,7 +18,8 @@ from tools import (
     search_code_examples,
     explain_concept,
     get_interview_questions,
-    get_learning_resources
+    get_learning_resources,
+    close_clients
 )
 
 
@@ -101,6 +102,8 @@ async def main():
     except Exception as e:
         print(f"\n❌ get_interview_questions: FAILED - {e}")
     
+    await close_clients()
+    
     print("\n" + "="*60)
     print("All tests completed!")
     print("="*60)
@@ -0,0 +1,6 @@
+"""Unit tests for the MCP server modules; run with `python -m pytest tests` from mcp-server/."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,107 @@
+"""Tests for the two-tier tool result cache (cache.py)."""
+
+import asyncio
+import sqlite3
+
+import cache
+from cache import ToolCache
+
+TTLS = {"fetch_docs": 60}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_normalized_arguments_share_an_entry():
+    tool_cache = ToolCache(None, TTLS)
+    run(tool_cache.set("fetch_docs", {"topic": "Python  Asyncio"}, "docs"))
+
+    assert run(tool_cache.get("fetch_docs", {"topic": "python asyncio"})) == "docs"
+    assert run(tool_cache.get("fetch_docs", {"topic": "python asyncio", "language": "python"})) is None
+
+
+def test_tools_without_ttl_are_not_cached():
+    tool_cache = ToolCache(None, TTLS)
+    run(tool_cache.set("search_code_examples", {"query": "bfs"}, "examples"))
+
+    assert run(tool_cache.get("search_code_examples", {"query": "bfs"})) is None
+
+
+def test_entries_expire_after_their_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    tool_cache = ToolCache(str(tmp_path / "tools.sqlite3"), TTLS)
+    run(tool_cache.set("fetch_docs", {"topic": "sql join"}, "docs"))
+
+    now[0] += 59
+    assert run(tool_cache.get("fetch_docs", {"topic": "sql join"})) == "docs"
+    now[0] += 2
+    assert run(tool_cache.get("fetch_docs", {"topic": "sql join"})) is None
+    tool_cache._memory.clear()
+    assert run(tool_cache.get("fetch_docs", {"topic": "sql join"})) is None
+    tool_cache.close()
+
+
+def test_memory_tier_drops_least_recently_used():
+    tool_cache = ToolCache(None, TTLS, memory_size=2)
+    for topic in ("a", "b"):
+        run(tool_cache.set("fetch_docs", {"topic": topic}, topic))
+    run(tool_cache.get("fetch_docs", {"topic": "a"}))
+    run(tool_cache.set("fetch_docs", {"topic": "c"}, "c"))
+
+    assert [run(tool_cache.get("fetch_docs", {"topic": topic})) for topic in "abc"] == ["a", None, "c"]
+
+
+def test_disk_tier_survives_restart_and_drops_least_recently_used(tmp_path):
+    path = str(tmp_path / "tools.sqlite3")
+    tool_cache = ToolCache(path, TTLS, memory_size=0, disk_size=2)
+    for topic in ("a", "b"):
+        run(tool_cache.set("fetch_docs", {"topic": topic}, topic))
+    run(tool_cache.get("fetch_docs", {"topic": "a"}))
+    run(tool_cache.set("fetch_docs", {"topic": "c"}, "c"))
+    tool_cache.close()
+
+    reopened = ToolCache(path, TTLS, memory_size=0)
+    assert [run(reopened.get("fetch_docs", {"topic": topic})) for topic in "abc"] == ["a", None, "c"]
+    reopened.close()
+
+
+def test_locked_file_does_not_fail_the_call(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(cache, "BUSY_TIMEOUT", 0.05)
+    path = str(tmp_path / "tools.sqlite3")
+    tool_cache = ToolCache(path, TTLS, memory_size=0)
+    run(tool_cache.set("fetch_docs", {"topic": "sql join"}, "docs"))
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        assert run(tool_cache.get("fetch_docs", {"topic": "sql join"})) == "docs"
+        run(tool_cache.set("fetch_docs", {"topic": "sql group by"}, "docs"))
+        assert "database is locked" in caplog.text
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    assert run(tool_cache.get("fetch_docs", {"topic": "sql group by"})) is None
+    tool_cache.close()
+
+
+def test_broken_file_is_a_miss(tmp_path, caplog):
+    path = str(tmp_path / "tools.sqlite3")
+    tool_cache = ToolCache(path, TTLS, memory_size=0)
+    run(tool_cache.set("fetch_docs", {"topic": "sql join"}, "docs"))
+    with sqlite3.connect(path) as other:
+        other.execute("DROP TABLE tool_results")
+
+    assert run(tool_cache.get("fetch_docs", {"topic": "sql join"})) is None
+    assert "treating as a miss" in caplog.text
+    tool_cache.close()
+
+
+def test_unusable_path_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    tool_cache = ToolCache(str(blocker / "tools.sqlite3"), TTLS)
+    run(tool_cache.set("fetch_docs", {"topic": "sql join"}, "docs"))
+
+    assert run(tool_cache.get("fetch_docs", {"topic": "sql join"})) == "docs"
@@ -0,0 +1,62 @@
+"""Tests for the offline BM25 docs index (docs_index.py)."""
+
+import pytest
+
+import docs_index
+from docs_index import DocsIndex, build_index
+
+CORPUS = {
+    "python-asyncio.md": ("Python asyncio", "python", "asyncio runs coroutines on an event loop. await a coroutine."),
+    "python-dict.md": ("Python dict", "python", "A dict maps keys to values. Lookups by key are O(1)."),
+    "sql-join.md": ("SQL JOIN", "sql", "JOIN combines rows from two tables on a key. INNER JOIN keeps matching rows."),
+    "js-promise.md": ("JavaScript Promise", "javascript", "A Promise is the eventual result of async work. await a promise."),
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for name, (title, language, body) in CORPUS.items():
+        (corpus / name).write_text(f"title: {title}\nlanguage: {language}\n\n{body}\n", encoding="utf-8")
+    (corpus / "notes.json").write_text("{}")
+    path = str(tmp_path / "docs_index.bin")
+    assert build_index(str(corpus), path) == len(CORPUS)
+    return DocsIndex(path)
+
+
+def test_round_trip_of_docs(index):
+    titles = {index.doc(doc_id).title for doc_id in range(index.n_docs)}
+    assert titles == {title for title, _, _ in CORPUS.values()}
+
+
+def test_search_ranks_the_best_match_first(index):
+    (doc, matched), *_ = index.search("dict key lookups")
+    assert doc.title == "Python dict" and matched == 3
+
+
+def test_search_filters_by_language(index):
+    results = index.search("await", language="javascript")
+    assert [doc.title for doc, _ in results] == ["JavaScript Promise"]
+    assert {doc.title for doc, _ in index.search("await")} == {"JavaScript Promise", "Python asyncio"}
+
+
+def test_lookup_only_answers_confident_hits(index):
+    assert index.lookup("SQL JOIN", "sql").title == "SQL JOIN"
+    assert index.lookup("python asyncio").title == "Python asyncio"
+    assert index.lookup("python decorators") is None  # "decorators" is not in the corpus
+    assert index.lookup("rows", "sql") is None  # no query term in the title
+    assert index.lookup("the of") is None  # stopwords only
+
+
+def test_unknown_file_is_rejected(tmp_path):
+    path = tmp_path / "docs_index.bin"
+    path.write_bytes(b"\0" * docs_index.HEADER.size)
+    with pytest.raises(OSError):
+        DocsIndex(str(path))
+
+
+def test_bundled_corpus_builds(tmp_path):
+    path = str(tmp_path / "docs_index.bin")
+    assert build_index(path=path) > 0
+    assert DocsIndex(path).lookup("list comprehension", "python") is not None
@@ -0,0 +1,66 @@
+"""Tests for fan_out and the partial results of search_code_examples (tools.py)."""
+
+import asyncio
+
+import tools
+from tools import fan_out
+
+
+async def answer(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def fail(message):
+    raise RuntimeError(message)
+
+
+def test_outcome_per_call():
+    outcomes = asyncio.run(fan_out({
+        "fast": answer("ok"),
+        "broken": fail("HTTP 500"),
+        "slow": answer("late", delay=5),
+    }, deadline=0.1))
+
+    assert outcomes["fast"].ok and outcomes["fast"].value == "ok"
+    assert outcomes["broken"].error == "HTTP 500"
+    assert outcomes["slow"].error == "timed out after 0.1s"
+
+
+def test_late_calls_are_cancelled():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    asyncio.run(fan_out({"slow": slow()}, deadline=0.05))
+    assert cancelled == [True]
+
+
+def test_calls_run_concurrently():
+    async def timed():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await fan_out({name: answer(name, delay=0.2) for name in "abc"}, deadline=1)
+        return loop.time() - started
+
+    assert asyncio.run(timed()) < 0.5
+
+
+def test_search_code_examples_reports_the_missing_upstream(monkeypatch):
+    async def search_github(query, language, max_results):
+        return [{"error": "GitHub API rate limit. Add GITHUB_TOKEN for higher limits."}]
+
+    async def call_perplexity(system_prompt, user_prompt):
+        return "Example code"
+
+    monkeypatch.setattr(tools, "search_github", search_github)
+    monkeypatch.setattr(tools, "call_perplexity", call_perplexity)
+    result = asyncio.run(tools.search_code_examples("binary search", "python"))
+
+    assert "Partial results" in result and "GitHub references unavailable" in result
+    assert "Example code" in result
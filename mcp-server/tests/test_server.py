@@ -0,0 +1,48 @@
+"""Tests for the cache handling in server.call_tool."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("mcp")
+
+import server
+from cache import ToolCache
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    async def fetch_docs(topic, language="general"):
+        calls.append(topic)
+        if topic == "broken":
+            raise RuntimeError("upstream down")
+        return f"docs {len(calls)}"
+
+    monkeypatch.setattr(server, "fetch_docs", fetch_docs)
+    monkeypatch.setattr(server, "tool_cache", ToolCache(None, server.CACHE_TTLS))
+    return calls
+
+
+def call(arguments):
+    return asyncio.run(server.call_tool("fetch_docs", arguments))[0].text
+
+
+def test_repeats_are_served_from_the_cache(calls):
+    assert call({"topic": "SQL join"}) == "docs 1"
+    assert call({"topic": "sql  JOIN"}) == "docs 1"
+    assert calls == ["SQL join"]
+
+
+def test_bypass_cache_fetches_and_replaces_the_entry(calls):
+    call({"topic": "sql join"})
+    assert call({"topic": "sql join", "bypass_cache": True}) == "docs 2"
+    assert call({"topic": "sql join"}) == "docs 2"
+    assert len(calls) == 2
+
+
+def test_failures_are_not_cached(calls):
+    assert call({"topic": "broken"}).startswith("Error: ")
+    call({"topic": "broken"})
+    assert calls == ["broken", "broken"]
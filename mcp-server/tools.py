@@ -5,15 +5,23 @@ Each tool fetches documentation, code examples, or AI-powered explanations
 from external sources.
 """
 
+import asyncio
 import os
 import httpx
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Awaitable, Optional
+
+from docs_index import get_docs_index
 
 # API Configuration
 PERPLEXITY_API_URL = "https://api.perplexity.ai/chat/completions"
 GITHUB_API_URL = "https://api.github.com"
 
 
+class PerplexityError(Exception):
+    """Perplexity could not answer; raised so failures are reported, never cached."""
+
+
 def get_perplexity_key() -> str:
     return os.getenv("PERPLEXITY_API_KEY", "")
 
@@ -22,57 +30,145 @@ def get_github_token() -> Optional[str]:
     return os.getenv("GITHUB_TOKEN")
 
 
+# ============================================================================
+# HTTP CLIENTS
+# ============================================================================
+
+# One long-lived HTTP/2 client per upstream, so tool calls reuse warm
+# connections instead of paying a TCP + TLS handshake each time.
+# main() opens them and closes them on shutdown; they are also created
+# lazily so the tools work when imported on their own (e.g. test_tools.py).
+CLIENT_SETTINGS = {
+    "perplexity": {
+        "timeout": httpx.Timeout(30.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120.0),
+    },
+    "github": {
+        "base_url": GITHUB_API_URL,
+        "headers": {"Accept": "application/vnd.github.v3+json"},
+        "timeout": httpx.Timeout(15.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=120.0),
+    },
+}
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """The shared client for an upstream ("perplexity" or "github")."""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(http2=True, **CLIENT_SETTINGS[name])
+        _clients[name] = client
+    return client
+
+
+def open_clients() -> None:
+    for name in CLIENT_SETTINGS:
+        get_client(name)
+
+
+async def close_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
 async def call_perplexity(system_prompt: str, user_prompt: str) -> str:
     """Make a request to Perplexity API."""
     api_key = get_perplexity_key()
     if not api_key:
-        return "Error: PERPLEXITY_API_KEY not configured"
+        raise PerplexityError("PERPLEXITY_API_KEY not configured")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-            PERPLEXITY_API_URL,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "sonar",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.7
-            }
-        )
-        response.raise_for_status()
-        data = response.json()
-        return data.get("choices", [{}])[0].get("message", {}).get("content", "No response")
+    response = await get_client("perplexity").post(
+        PERPLEXITY_API_URL,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        },
+        json={
+            "model": "sonar",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 0.7
+        }
+    )
+    response.raise_for_status()
+    data = response.json()
+    content = data.get("choices", [{}])[0].get("message", {}).get("content")
+    if not content:
+        raise PerplexityError("Empty response from Perplexity")
+    return content
 
 
 async def search_github(query: str, language: str, max_results: int = 3) -> list[dict]:
     """Search GitHub for code examples."""
-    headers = {"Accept": "application/vnd.github.v3+json"}
+    headers = {}
     token = get_github_token()
     if token:
         headers["Authorization"] = f"token {token}"
     
     search_query = f"{query} language:{language}"
     
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        response = await client.get(
-            f"{GITHUB_API_URL}/search/code",
-            headers=headers,
-            params={"q": search_query, "per_page": max_results}
-        )
-        
-        if response.status_code == 403:
-            return [{"error": "GitHub API rate limit. Add GITHUB_TOKEN for higher limits."}]
-        
-        if response.status_code != 200:
-            return []
-        
-        data = response.json()
-        return data.get("items", [])
+    response = await get_client("github").get(
+        "/search/code",
+        headers=headers,
+        params={"q": search_query, "per_page": max_results}
+    )
+    
+    if response.status_code == 403:
+        return [{"error": "GitHub API rate limit. Add GITHUB_TOKEN for higher limits."}]
+    
+    if response.status_code != 200:
+        return []
+    
+    data = response.json()
+    return data.get("items", [])
+
+
+# ============================================================================
+# FAN-OUT
+# ============================================================================
+
+# Overall budget for tools that query several upstreams at once.
+FAN_OUT_DEADLINE = float(os.getenv("MCP_FAN_OUT_DEADLINE", "25"))
+
+
+@dataclass
+class Outcome:
+    value: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def fan_out(calls: dict[str, Awaitable], deadline: float = FAN_OUT_DEADLINE) -> dict[str, Outcome]:
+    """
+    Run independent upstream calls concurrently and wait at most `deadline`
+    seconds for all of them. Returns an Outcome per call name: the value,
+    or why it failed (its exception, or a timeout; late calls are cancelled).
+    Never raises, so the tool decides what a partial result looks like.
+    """
+    tasks = {name: asyncio.ensure_future(call) for name, call in calls.items()}
+    _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    outcomes = {}
+    for name, task in tasks.items():
+        if task in pending:
+            outcomes[name] = Outcome(error=f"timed out after {deadline:g}s")
+        elif task.exception() is not None:
+            outcomes[name] = Outcome(error=str(task.exception()) or type(task.exception()).__name__)
+        else:
+            outcomes[name] = Outcome(value=task.result())
+    return outcomes
 
 
 # ============================================================================
@@ -82,8 +178,14 @@ async def search_github(query: str, language: str, max_results: int = 3) -> list
 async def fetch_docs(topic: str, language: str = "general") -> str:
     """
     Fetch official documentation for a programming concept.
-    Uses Perplexity to search and summarize documentation.
+    Answers from the bundled offline index (docs_index.py) when it covers
+    the topic; otherwise uses Perplexity to search and summarize documentation.
     """
+    index = get_docs_index()
+    doc = index.lookup(topic, language) if index is not None else None
+    if doc is not None:
+        return f"📚 **Documentation: {topic}** (offline: {doc.title})\n\n{doc.text}"
+    
     system_prompt = """You are a documentation expert. Fetch and summarize official documentation.
     
 Format your response as:
@@ -121,11 +223,9 @@ async def search_code_examples(query: str, language: str, max_results: int = 3)
     """
     Search for real-world code examples from GitHub.
     Returns practical code snippets with explanations.
+    GitHub and Perplexity are queried concurrently under FAN_OUT_DEADLINE;
+    if one of them fails, the other's results are returned marked as partial.
     """
-    # First, try GitHub search
-    github_results = await search_github(query, language, max_results)
-    
-    # Then use Perplexity to generate practical examples
     system_prompt = f"""You are a senior {language} developer. Provide practical code examples.
 
 Format each example as:
@@ -148,18 +248,35 @@ Make examples:
 3. Handle edge cases
 4. Be runnable as-is"""
     
-    result = await call_perplexity(system_prompt, user_prompt)
+    outcomes = await fan_out({
+        "github": search_github(query, language, max_results),
+        "perplexity": call_perplexity(system_prompt, user_prompt),
+    })
+    github, examples = outcomes["github"], outcomes["perplexity"]
+    if github.ok and github.value and github.value[0].get("error"):
+        github = Outcome(error=github.value[0]["error"])
+    
+    if not github.ok and not examples.ok:
+        raise RuntimeError(f"No upstream answered (GitHub: {github.error}; Perplexity: {examples.error})")
+    
+    missing = []
+    if not examples.ok:
+        missing.append(f"AI examples unavailable ({examples.error})")
+    if not github.ok:
+        missing.append(f"GitHub references unavailable ({github.error})")
+    notice = f"⚠️ **Partial results:** {'; '.join(missing)}\n\n" if missing else ""
     
     # Add GitHub sources if available
     sources = ""
-    if github_results and not github_results[0].get("error"):
+    if github.ok and github.value:
         sources = "\n\n---\n📎 **GitHub References:**\n"
-        for item in github_results[:3]:
+        for item in github.value[:3]:
             repo = item.get("repository", {}).get("full_name", "Unknown")
             path = item.get("path", "")
             sources += f"- [{repo}/{path}]({item.get('html_url', '#')})\n"
     
-    return f"💻 **Code Examples: {query}**\n\n{result}{sources}"
+    body = f"{examples.value or ''}{sources}".lstrip()
+    return f"💻 **Code Examples: {query}**\n\n{notice}{body}"
 
 
 async def explain_concept(concept: str, difficulty: str = "intermediate", include_code: bool = True) -> str: